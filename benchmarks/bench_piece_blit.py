@@ -0,0 +1,73 @@
+"""
+Compares blitting the pieces of a 1000 piece rotatable puzzle in the pixel format they are loaded and cut in
+against the same pieces converted to the display format. Both sides blit the same tiles: the plain cells
+square pieces draw and the shaped tiles with knob margins regular pieces draw.
+Run from the repository root: python benchmarks/bench_piece_blit.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import pygame  # noqa: E402
+from src import jigsaw_mask  # noqa: E402
+from src.regular_puzzle import RegularPuzzle  # noqa: E402
+from benchmarks.bench_static_layer import IMAGE_SIZE, SCREEN_SIZE, make_image  # noqa: E402
+
+PIECES = 1000
+ROUNDS = 50
+
+
+def time_blits(screen, images_and_rects):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for image, rect in images_and_rects:
+            screen.blit(image, rect)
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def shaped_tile(image, piece):
+    """the shaped tile of piece cut from image, in the format jigsaw_mask.cut makes before converting it"""
+    cell = image.subsurface(pygame.Rect(piece.base_image.get_offset(), piece.base_image.get_size()))
+    margin = jigsaw_mask.tab_margin(cell.get_size())
+    area = cell.get_rect(topleft=cell.get_offset()).inflate(2 * margin, 2 * margin)
+    tile = pygame.Surface(area.size, pygame.SRCALPHA)
+    source = area.clip(image.get_rect())
+    tile.blit(image, (source.x - area.x, source.y - area.y), source)
+    pixels = pygame.surfarray.pixels_alpha(tile)
+    pixels[...] = jigsaw_mask.alpha(piece.tab_signature(), cell.get_size())
+    del pixels
+    return pygame.transform.rotate(tile, piece.direction * 90)
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "bench.png")
+        make_image(image_path)
+        puzzle = RegularPuzzle(screen, IMAGE_SIZE[0], IMAGE_SIZE[1], PIECES, image_path, True)
+        image = pygame.transform.scale(pygame.image.load(image_path), IMAGE_SIZE)
+        pieces = list(puzzle.pieces.values())
+        cells = [(pygame.transform.rotate(image.subsurface(pygame.Rect(piece.base_image.get_offset(),
+                                                                       piece.base_image.get_size())),
+                                          piece.direction * 90), piece.piece) for piece in pieces]
+        shaped = [(shaped_tile(image, piece), piece.get_draw_rect()) for piece in pieces]
+        cases = (("cells", cells, lambda tile: tile.convert()),
+                 ("shaped", shaped, lambda tile: tile.convert_alpha()))
+        for name, tiles, convert in cases:
+            converted = [(convert(tile), rect) for tile, rect in tiles]
+            old = time_blits(screen, tiles)
+            new = time_blits(screen, converted)
+            print(f"{len(tiles)} {name:6} tiles: as loaded {old:7.3f} ms/frame, display format {new:7.3f} ms/frame "
+                  f"({old / new:4.1f}x)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
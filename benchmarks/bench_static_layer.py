@@ -0,0 +1,64 @@
+"""
+Compares drag frame times of the full redraw path against the cached static layer.
+Run from the repository root: python benchmarks/bench_static_layer.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import pygame  # noqa: E402
+from src.regular_puzzle import RegularPuzzle  # noqa: E402
+
+SCREEN_SIZE = (1200, 900)
+IMAGE_SIZE = (1000, 800)
+FRAMES = 200
+BACKGROUND = (52, 78, 91)
+TEXT_COL = (255, 255, 255)
+
+
+def make_image(path):
+    image = pygame.Surface(IMAGE_SIZE)
+    for x in range(0, IMAGE_SIZE[0], 20):
+        for y in range(0, IMAGE_SIZE[1], 20):
+            image.fill(((x * 7) % 256, (y * 5) % 256, (x + y) % 256), (x, y, 20, 20))
+    pygame.image.save(image, path)
+
+
+def time_drag(puzzle, screen, background):
+    piece = next(iter(puzzle.pieces.values()))
+    puzzle.handle_click(piece.piece.center)
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        puzzle.move((1 if frame % 2 else -1, 1))
+        if background is None:
+            screen.fill(BACKGROUND)
+        puzzle.draw(screen, TEXT_COL, background)
+    elapsed = time.perf_counter() - start
+    puzzle.handle_click(piece.piece.center)
+    puzzle.handle_click_stop()
+    return elapsed / FRAMES * 1000
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "bench.png")
+        make_image(image_path)
+        for amount in (500, 1500):
+            puzzle = RegularPuzzle(screen, IMAGE_SIZE[0], IMAGE_SIZE[1], amount, image_path, False)
+            full = time_drag(puzzle, screen, None)
+            cached = time_drag(puzzle, screen, BACKGROUND)
+            print(f"{amount:5} pieces: full redraw {full:7.3f} ms/frame, static layer {cached:7.3f} ms/frame "
+                  f"({full / cached:4.1f}x)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
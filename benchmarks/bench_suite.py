@@ -0,0 +1,173 @@
+"""
+Times the puzzle engine headless on procedurally generated images, from 100 to 1500 pieces.
+Run from the repository root:
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --baseline results.json
+The second form runs the suite again and reports every case that got slower than the baseline by more
+than --threshold, exiting with status 1 if there is one.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import pygame  # noqa: E402
+from src import audio_handler  # noqa: E402
+from src.puzzle import Puzzle, piece_grids  # noqa: E402
+from src.regular_puzzle import RegularPuzzle  # noqa: E402
+from src.square_puzzle import SquarePuzzle  # noqa: E402
+from benchmarks.bench_static_layer import BACKGROUND, IMAGE_SIZE, SCREEN_SIZE, TEXT_COL, make_image  # noqa: E402
+
+SIZES = (100, 300, 600, 1000, 1500)
+PUZZLE_TYPES = {'regular': RegularPuzzle, 'square': SquarePuzzle}
+
+
+def measure(function, repeat):
+    """median wall time of function over repeat runs, in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def solve(puzzle, rows=None):
+    """
+    connects every piece to the one before it in its row and to the one above it, returns the last piece.
+    With rows only that many rows from the top are solved.
+    """
+    cols, all_rows = puzzle.rowcols
+    piece = None
+    for row in range(all_rows if rows is None else rows):
+        for col in range(cols):
+            piece = puzzle.pieces[(row, col)]
+            if col:
+                puzzle.connect_pieces(piece, puzzle.pieces[(row, col - 1)], (0, -1))
+            if row:
+                puzzle.connect_pieces(piece, puzzle.pieces[(row - 1, col)], (-1, 0))
+    return piece
+
+
+def run_cases(puzzle_cls, amount, screen, image_path, tmp, repeat):
+    results = {}
+    puzzles = []
+
+    def construct():
+        puzzles.append(puzzle_cls(screen, IMAGE_SIZE[0], IMAGE_SIZE[1], amount, image_path, True, seed=1))
+
+    results['construct'] = measure(construct, repeat)
+    puzzle = puzzles[-1]
+    amount = puzzle.get_amount()
+
+    results['draw_full'] = measure(lambda: puzzle.draw(screen, TEXT_COL), repeat)
+    puzzle.draw(screen, TEXT_COL, BACKGROUND)
+    results['draw_static_layer'] = measure(lambda: puzzle.draw(screen, TEXT_COL, BACKGROUND), repeat)
+
+    def pickup_and_drop():
+        piece = puzzle.pieces[(0, 0)]
+        puzzle.handle_click(piece.piece.center)
+        puzzle.handle_click_stop()
+        puzzle.move((5, 5))
+        puzzle.handle_click(piece.piece.center)
+        puzzle.handle_click_stop()
+
+    results['pickup_drop'] = measure(pickup_and_drop, repeat)
+
+    def cascade():
+        puzzles.append(puzzle_cls(screen, IMAGE_SIZE[0], IMAGE_SIZE[1], amount, image_path, True, seed=1))
+        start = time.perf_counter()
+        solve(puzzles[-1])
+        return time.perf_counter() - start
+
+    results['connect_cascade'] = statistics.median(cascade() * 1000 for _ in range(repeat))
+    solved = puzzles[-1]
+    solved.active = solved.pieces[(0, 0)]
+    results['rotate_group'] = measure(lambda: solved.rotate(True), repeat)
+    solved.active = None
+
+    half_solved = puzzle_cls(screen, IMAGE_SIZE[0], IMAGE_SIZE[1], amount, image_path, True, seed=1)
+    solve(half_solved, half_solved.rowcols[1] // 2)
+    # a fresh puzzle has no groups, saves of partly and fully solved ones restore theirs on load
+    for suffix, saved in (("", puzzle), ("_half", half_solved), ("_solved", solved)):
+        save_path = os.path.join(tmp, f"{puzzle_cls.__name__}{amount}{suffix}.pkl")
+        saved.save_path = save_path
+        results['save' + suffix] = measure(saved.save_to_file, repeat)
+        results['load' + suffix] = measure(lambda: puzzle_cls.load(save_path, screen), repeat)
+    return amount, results
+
+
+def run_suite(sizes, repeat):
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "bench.png")
+        make_image(image_path)
+
+        def possible_piece_dims():
+            piece_grids.cache_clear()
+            Puzzle.get_possible_piece_dims(*IMAGE_SIZE)
+
+        results['get_possible_piece_dims'] = measure(possible_piece_dims, repeat)
+        for name, puzzle_cls in PUZZLE_TYPES.items():
+            for size in sizes:
+                amount, cases = run_cases(puzzle_cls, size, screen, image_path, tmp, repeat)
+                for case, value in cases.items():
+                    results[f"{name}/{amount}/{case}"] = value
+                print(f"{name:8} {amount:5} pieces: " + ", ".join(f"{case} {value:.2f}" for case, value in cases.items()))
+    pygame.quit()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """prints every case against the baseline, returns the cases slower than threshold times the baseline"""
+    regressions = []
+    for case, value in sorted(results.items()):
+        old = baseline.get(case)
+        if old is None:
+            continue
+        ratio = value / old if old else float('inf')
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(case)
+        print(f"{case:45} {old:9.3f} -> {value:9.3f} ms ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="piece counts to run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the median is reported")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    audio_handler.init(audio_handler.NullBackend())  # the engine is measured, not the sound
+    results = run_suite(args.sizes, args.repeat)
+    report = {'python': platform.python_version(), 'pygame': pygame.version.ver, 'unit': 'ms', 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
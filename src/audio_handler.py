@@ -1,13 +1,100 @@
-import threading
-from audioplayer import AudioPlayer
+import glob
+import time
 
+import pygame
 
-def play_sound_basic(sound):
-    AudioPlayer(sound).play(block=True)  # for some reason, block=False doesn't play sound, so threading used
+CHANNELS = 8  # sounds that can play at once, a new one takes the channel that has been playing longest
+COALESCE_MS = 60  # the same sound started again within this time is merged into the one already playing
+PRELOADED_SOUNDS = ("resources/piece_click.mp3", "resources/button*.wav")
 
 
-def play_sound(sound):
-    def _play():
-        play_sound_basic(sound)
+class MixerBackend:
+    """plays sounds decoded once on a fixed pool of pygame mixer channels"""
+
+    def __init__(self, channels=CHANNELS):
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        pygame.mixer.set_num_channels(channels)
+        self._sounds = {}
+
+    def load(self, path):
+        """the decoded sound, None if the file cannot be played, either way the file is only read once"""
+        if path not in self._sounds:
+            try:
+                self._sounds[path] = pygame.mixer.Sound(path)
+            except (pygame.error, OSError):
+                self._sounds[path] = None
+        return self._sounds[path]
+
+    def play(self, path):
+        sound = self.load(path)
+        if sound is not None:
+            pygame.mixer.find_channel(True).play(sound)
+
+
+class NullBackend:
+    """makes no sound, for headless runs, replays, benchmarks and machines without an audio device"""
+
+    def __init__(self):
+        self.plays = 0
+
+    def load(self, path):
+        return None
+
+    def play(self, path):
+        self.plays += 1
+
+
+class AudioService:
+    """
+    Front of a backend that drops a sound when the same one was started less than coalesce_ms ago,
+    so the several connections one drop can make give one click instead of a burst.
+    """
 
-    threading.Thread(target=_play, daemon=True).start()
+    def __init__(self, backend, coalesce_ms=COALESCE_MS, clock=None):
+        self.backend = backend
+        self.coalesce_ms = coalesce_ms
+        self.clock = clock or (lambda: time.monotonic() * 1000)
+        self._last_started = {}
+
+    def preload(self, patterns=PRELOADED_SOUNDS):
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                self.backend.load(path)
+
+    def play(self, path):
+        """starts the sound unless it is coalesced into the same one started just before, returns whether it started"""
+        now = self.clock()
+        last = self._last_started.get(path)
+        if last is not None and now - last < self.coalesce_ms:
+            return False
+        self._last_started[path] = now
+        self.backend.play(path)
+        return True
+
+
+_service = None
+
+
+def init(backend=None):
+    """
+    Sets up the audio service and decodes the game's sounds. Without a backend the pygame mixer is used,
+    or the null backend if there is no audio device.
+    """
+    global _service
+    if backend is None:
+        try:
+            backend = MixerBackend()
+        except (pygame.error, NotImplementedError):  # no audio device, or pygame built without the mixer
+            backend = NullBackend()
+    _service = AudioService(backend)
+    _service.preload()
+    return _service
+
+
+def get_service():
+    return _service if _service is not None else init()
+
+
+def play_sound(sound):
+    get_service().play(sound)
@@ -0,0 +1,67 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+
+def write_atomic(filename, data):
+    """pickles data to a temporary file next to filename and renames it over filename"""
+    directory = os.path.dirname(filename) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Autosaver:
+    """
+    Periodically saves a snapshot of a puzzle. The snapshot is taken on the caller's thread,
+    pickling and writing happen on a worker thread, and at most one save is in flight.
+    """
+
+    def __init__(self, interval_s=30.0, clock=time.monotonic):
+        self.interval_s = interval_s
+        self.clock = clock
+        self.last_error = None
+        self._last_save = clock()
+        self._worker = None
+
+    def is_busy(self):
+        return self._worker is not None and self._worker.is_alive()
+
+    def is_due(self):
+        return self.clock() - self._last_save >= self.interval_s
+
+    def save(self, snapshot, filename, on_saved=None):
+        """
+        Starts writing snapshot in the background, returns False if a save is still in flight.
+        on_saved is called from the worker thread once the file is in place.
+        """
+        if self.is_busy():
+            return False
+        self._last_save = self.clock()
+        self._worker = threading.Thread(target=self._write, args=(snapshot, filename, on_saved), daemon=True)
+        self._worker.start()
+        return True
+
+    def _write(self, snapshot, filename, on_saved):
+        try:
+            write_atomic(filename, snapshot)
+            if on_saved is not None:
+                on_saved()
+            self.last_error = None
+        except OSError as error:
+            self.last_error = error
+
+    def wait(self):
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
@@ -1,5 +1,6 @@
 import pygame
-import audio_handler
+from src import audio_handler
+from src.text_cache import render_text
 
 
 class Button:
@@ -24,7 +25,7 @@ class Button:
             self.clicked = False
 
         pygame.draw.rect(surface, self.button_colour, self.rect)
-        text_surface = self.font.render(self.text, True, self.text_colour)
+        text_surface = render_text(self.font, self.text, self.text_colour)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
@@ -1,22 +1,77 @@
-import threading
+import heapq
+import itertools
+
+
+class _Scheduled:
+    __slots__ = ('due_ms', 'callback')
+
+    def __init__(self, due_ms, callback):
+        self.due_ms = due_ms
+        self.callback = callback
+
+    def cancel(self):
+        self.callback = None
+
+
+class TimerService:
+    """
+    Delayed actions on the frame clock of the game loop instead of on threads.
+    The loop calls tick once per frame with the milliseconds the frame took, the actions that came due
+    run right there, in the order they were due. Looking at the earliest one keeps an idle tick O(1),
+    cancelled actions stay in the heap until their time and are skipped then.
+    """
+
+    def __init__(self):
+        self.now_ms = 0
+        self._heap = []
+        self._order = itertools.count()  # keeps actions due at the same time in the order they were scheduled
+
+    def call_later(self, delay_ms, callback):
+        """runs callback on the first tick at least delay_ms from now, returns a handle with a cancel method"""
+        scheduled = _Scheduled(self.now_ms + delay_ms, callback)
+        heapq.heappush(self._heap, (scheduled.due_ms, next(self._order), scheduled))
+        return scheduled
+
+    def tick(self, elapsed_ms):
+        self.now_ms += elapsed_ms
+        while self._heap and self._heap[0][0] <= self.now_ms:
+            callback = heapq.heappop(self._heap)[2].callback
+            if callback is not None:
+                callback()
+
+    def pending(self):
+        return sum(1 for _, _, scheduled in self._heap if scheduled.callback is not None)
+
+    def reset(self):
+        """back to time zero without anything scheduled, for a replay that starts over"""
+        self.now_ms = 0
+        self._heap.clear()
+
+
+timers = TimerService()  # the service Game.run_game ticks
 
 
 class Timer:
+    """turns is_time_up on duration_ms after start, measured on the frame clock of the shared timer service"""
+
     def __init__(self, duration_ms):
         self.duration_ms = duration_ms
         self.timeUp = False
-        self._timer = None
+        self._scheduled = None
 
     def _time_up(self):
         self.timeUp = True
+        self._scheduled = None
 
     def start(self):
-        self._timer = threading.Timer(self.duration_ms / 1000, self._time_up)
-        self._timer.start()
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+        self._scheduled = timers.call_later(self.duration_ms, self._time_up)
 
     def stop(self):
-        if self._timer is not None:
-            self._timer.cancel()
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
         self.timeUp = False
 
     def is_time_up(self):
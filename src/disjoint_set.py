@@ -0,0 +1,52 @@
+class DisjointSet:
+    """
+    Union-find over hashable items with path compression and union by size.
+    Items that were never added are treated as singletons and added on first use.
+    The member set of every root is kept so a whole group can be returned without scanning.
+    """
+
+    def __init__(self, items=()):
+        self._parent = {}
+        self._members = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self._parent:
+            self._parent[item] = item
+            self._members[item] = {item}
+
+    def clear(self):
+        self._parent.clear()
+        self._members.clear()
+
+    def find(self, item):
+        if item not in self._parent:
+            self.add(item)
+            return item
+        root = item
+        while self._parent[root] is not root:
+            root = self._parent[root]
+        while self._parent[item] is not root:  # path compression
+            self._parent[item], item = root, self._parent[item]
+        return root
+
+    def union(self, item1, item2):
+        """returns (root, absorbed_root), absorbed_root is None if both were already joined"""
+        root1, root2 = self.find(item1), self.find(item2)
+        if root1 is root2:
+            return root1, None
+        if len(self._members[root1]) < len(self._members[root2]):
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._members[root1].update(self._members.pop(root2))
+        return root1, root2
+
+    def members(self, item):
+        return self._members[self.find(item)]
+
+    def size(self, item):
+        return len(self.members(item))
+
+    def groups(self):
+        return [members for members in self._members.values() if len(members) > 1]
@@ -1,4 +1,5 @@
 import pygame
+from src.text_cache import get_font, render_text
 
 
 class DropDownMenu:
@@ -42,8 +43,7 @@ class DropDownMenu:
                          (self.position[0], self.position[1], self.dims[0], self.dims[1]), 2)
 
         # Render and position the text on the button
-        font = pygame.font.Font(None, self.dims[2])
-        text_surface = font.render(self.selected_option, True, self.colors["text"])
+        text_surface = render_text(get_font(None, self.dims[2]), self.selected_option, self.colors["text"])
         text_rect = text_surface.get_rect(
             center=(self.position[0] + self.dims[0] / 2, self.position[1] + self.dims[1] / 2))
         self.surface.blit(text_surface, text_rect)
@@ -62,8 +62,7 @@ class DropDownMenu:
                 pygame.draw.rect(self.surface, self.colors["dropdown_border"], option_rect, 2)
 
                 # Render and position the text for each option
-                option_font = pygame.font.Font(None, self.dims[3])
-                option_surface = option_font.render(option, True, self.colors["dropdown_text"])
+                option_surface = render_text(get_font(None, self.dims[3]), option, self.colors["dropdown_text"])
                 option_rect = option_surface.get_rect(
                     center=(self.position[0] + self.dims[0] / 2, option_y + self.dims[4] / 2))
                 self.surface.blit(option_surface, option_rect)
@@ -86,6 +85,12 @@ class DropDownMenu:
             if pygame.Rect(self.position[0], self.position[1], self.dims[0], self.dims[1]).collidepoint(pos):
                 self.show_options = not self.show_options
 
+    def set_options(self, options):
+        self.options = options
+        self.start_index = 0
+        if self.selected_option not in options:
+            self.selected_option = options[0]
+
     def set_position(self, new_pos):
         self.position = new_pos
 
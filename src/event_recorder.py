@@ -0,0 +1,67 @@
+import pickle
+
+import pygame
+
+from src import custom_timer
+
+# the events Play reacts to and the attributes it reads from them
+RECORDED_EVENTS = {
+    pygame.MOUSEBUTTONDOWN: ('pos', 'button'),
+    pygame.MOUSEBUTTONUP: ('pos', 'button'),
+    pygame.MOUSEMOTION: ('pos', 'rel', 'buttons'),
+    pygame.KEYDOWN: ('key', 'mod'),
+    pygame.VIDEORESIZE: ('size', 'w', 'h'),
+    pygame.WINDOWEXPOSED: (),
+    pygame.QUIT: (),
+}
+
+
+class EventRecorder:
+    """
+    Records the input of a Play session so it can be replayed without a window or a player.
+    The file starts with a header holding the puzzle as it was when recording started, its seed
+    and the surface size, followed by one pickled (frame, milliseconds, events) record for every frame
+    that had events. Frames count the calls to record, milliseconds are the time of the frame clock
+    that drives the timers, counted from the start of the recording.
+    """
+    VERSION = 1
+
+    def __init__(self, filename, puzzle, surface_size):
+        self.filename = filename
+        self.frame = 0
+        self._start_ms = custom_timer.timers.now_ms
+        self._file = open(filename, 'wb')
+        pickle.dump({'version': self.VERSION, 'seed': puzzle.seed, 'surface_size': tuple(surface_size),
+                     'puzzle': puzzle.serialize()}, self._file)
+        self._file.flush()
+
+    def record(self, events):
+        """called once per frame with every event of that frame"""
+        recorded = [(event.type, {name: getattr(event, name) for name in RECORDED_EVENTS[event.type]})
+                    for event in events if event.type in RECORDED_EVENTS]
+        if recorded and self._file is not None:
+            pickle.dump((self.frame, custom_timer.timers.now_ms - self._start_ms, recorded), self._file)
+            self._file.flush()
+        self.frame += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(filename):
+    """
+    Returns the header and the list of (frame, milliseconds, events) records of a recording,
+    the events rebuilt as pygame events. A record cut off by a crash ends the list.
+    """
+    records = []
+    with open(filename, 'rb') as file:
+        header = pickle.load(file)
+        while True:
+            try:
+                frame, ms, events = pickle.load(file)
+            except (EOFError, pickle.UnpicklingError):
+                break
+            records.append((frame, ms, [pygame.event.Event(event_type, attrs) for event_type, attrs in events]))
+    return header, records
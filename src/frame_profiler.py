@@ -0,0 +1,180 @@
+import bisect
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import pygame
+
+from src.text_cache import get_font, render_text
+
+HISTORY_FRAMES = 600  # frames kept for the statistics and the trace, ten seconds at the frame cap
+HISTOGRAM_BUCKETS_MS = (1, 2, 4, 8, 10, 16, 33, 50, 100)  # upper bounds, the last bucket takes everything above
+OVERLAY_SIZE = (250, 122)
+
+enabled = False
+
+_NO_SECTION = nullcontext()
+_frames = deque(maxlen=HISTORY_FRAMES)  # (start_ns, duration_ns, [(name, start_ns, duration_ns), ...])
+_section_times = {}  # name -> deque of the per-frame total in ns
+_current = None
+_last_trace = None  # path of the last trace written, shown on the overlay
+
+
+class _Section:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        if _current is not None:
+            _current[1].append((self.name, self.start, time.perf_counter_ns() - self.start))
+
+
+def section(name):
+    """
+    Context manager timing the code inside it as a named span of the current frame.
+    While profiling is off this returns a shared no-op context, so the hooks can stay in hot loops.
+    """
+    return _Section(name) if enabled else _NO_SECTION
+
+
+def set_enabled(value):
+    global enabled, _current
+    enabled = value
+    if not value:
+        _current = None
+
+
+def toggle():
+    set_enabled(not enabled)
+
+
+def begin_frame():
+    global _current
+    if enabled:
+        _current = (time.perf_counter_ns(), [])
+
+
+def end_frame():
+    global _current
+    if _current is None:
+        return
+    start, spans = _current
+    _current = None
+    _frames.append((start, time.perf_counter_ns() - start, spans))
+    totals = {}
+    for name, _, duration in spans:
+        totals[name] = totals.get(name, 0) + duration
+    for name, total in totals.items():
+        times = _section_times.get(name)
+        if times is None:
+            times = _section_times[name] = deque(maxlen=HISTORY_FRAMES)
+        times.append(total)
+
+
+def clear():
+    global _current, _last_trace
+    _frames.clear()
+    _section_times.clear()
+    _current = None
+    _last_trace = None
+
+
+def frame_times_ms():
+    return [duration / 1e6 for _, duration, _ in _frames]
+
+
+def section_times_ms(name):
+    """total time per frame spent in the named section, over the frames in which it ran"""
+    return [duration / 1e6 for duration in _section_times.get(name, ())]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def histogram(values, buckets=HISTOGRAM_BUCKETS_MS):
+    """counts of values per bucket, a value falls in the first bucket whose upper bound is not below it"""
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        counts[bisect.bisect_left(buckets, value)] += 1
+    return counts
+
+
+def fps():
+    """frames per second over the kept history, measured from frame start to frame start"""
+    if len(_frames) < 2:
+        return 0.0
+    elapsed = _frames[-1][0] - _frames[0][0]
+    return (len(_frames) - 1) * 1e9 / elapsed if elapsed else 0.0
+
+
+def summary():
+    """p50 and p99 in ms of the frame and of every section, keyed by name, the frame under 'frame'"""
+    result = {'frame': frame_times_ms()}
+    result.update((name, section_times_ms(name)) for name in _section_times)
+    return {name: (percentile(times, 0.5), percentile(times, 0.99)) for name, times in result.items()}
+
+
+def draw_overlay(surface):
+    """
+    Draws the frame statistics and a histogram of the frame times in the bottom left corner.
+    The box has a fixed size and is opaque, so redrawing it every frame needs no cleanup underneath.
+    Returns the rect it covered.
+    """
+    rect = pygame.Rect((0, 0), OVERLAY_SIZE)
+    rect.bottomleft = (10, surface.get_height() - 10)
+    surface.fill((20, 20, 20), rect)
+    font = get_font(None, 20)
+    times = frame_times_ms()
+    lines = [f"FPS {fps():.0f}",
+             f"frame p50 {percentile(times, 0.5):.2f} ms  p99 {percentile(times, 0.99):.2f} ms"]
+    if _last_trace is not None:
+        lines.append(f"trace {os.path.basename(_last_trace)}")
+    for i, line in enumerate(lines):
+        surface.blit(render_text(font, line, (230, 230, 230)), (rect.x + 6, rect.y + 6 + i * 18))
+    counts = histogram(times)
+    most = max(counts) or 1
+    bar_width = (rect.width - 12) // len(counts)
+    bottom = rect.bottom - 6
+    top = rect.y + 12 + len(lines) * 18
+    for i, count in enumerate(counts):
+        height = int((bottom - top) * count / most)
+        colour = (90, 200, 90) if i < 6 else (220, 180, 60) if i < 7 else (220, 80, 60)
+        surface.fill(colour, (rect.x + 6 + i * bar_width, bottom - height, bar_width - 2, height))
+    return rect
+
+
+def chrome_trace():
+    """the kept frames in the Chrome trace event format, one complete event per frame and per section"""
+    events = []
+    for start, duration, spans in _frames:
+        events.append({'name': 'frame', 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                       'ts': start / 1000, 'dur': duration / 1000})
+        events += [{'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                    'ts': span_start / 1000, 'dur': span_duration / 1000}
+                   for name, span_start, span_duration in spans]
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def dump_trace(directory="traces"):
+    """
+    writes chrome_trace to a new file in directory, to open in chrome://tracing or Perfetto, returns its path.
+    The overlay shows the name of the file.
+    """
+    global _last_trace
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+    with open(path, 'w') as file:
+        json.dump(chrome_trace(), file)
+    _last_trace = path
+    return path
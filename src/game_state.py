@@ -1,13 +1,21 @@
 import os
+import sqlite3
+import time
 import pygame
 import colour_consts
 
 from abc import ABC, abstractmethod
 from button import Button
 from dropdown_menu import DropDownMenu
+from event_recorder import EventRecorder
+from journal import MoveJournal
+from preview_loader import PreviewLoader
 from puzzle import Puzzle
 from regular_puzzle import RegularPuzzle
+from save_catalog import SaveCatalog
 from src.square_puzzle import SquarePuzzle
+from stopwatch import Stopwatch
+from src.text_cache import get_font, render_text
 
 
 class State(ABC):
@@ -25,14 +33,15 @@ class State(ABC):
     }
 
     def __init__(self, surface, theme=THEMES.get('darkblue')):
-        self.font = pygame.font.SysFont("arialblack", 40)
-        self.smallfont = pygame.font.SysFont("arialblack", 20)
+        self.font = get_font("arialblack", 40)
+        self.smallfont = get_font("arialblack", 20)
         self.theme = theme
         self.TEXT_COL = theme.get('text')
         self.BACKGROUND = theme.get('bg')
         self.BUTTON_COL = theme.get('button')
         self.surface = surface
         self.quit = False
+        self.update_rects = None  # None updates the whole display
 
     @abstractmethod
     def handle_events(self, events):
@@ -47,13 +56,18 @@ class State(ABC):
     def resize(self):
         pass
 
+    def get_update_rects(self):
+        return self.update_rects
+
+    def request_full_redraw(self):
+        """makes the next frame repaint the whole surface, only states that draw partially have to act on it"""
+        return
+
     def display_text(self, text, x, y):
-        text = self.font.render(text, True, self.TEXT_COL)
-        self.surface.blit(text, (x, y))
+        self.surface.blit(render_text(self.font, text, self.TEXT_COL), (x, y))
 
     def display_small_text(self, text, x, y):
-        text = self.smallfont.render(text, True, self.TEXT_COL)
-        self.surface.blit(text, (x, y))
+        self.surface.blit(render_text(self.smallfont, text, self.TEXT_COL), (x, y))
 
 
 class Menu(State):
@@ -91,26 +105,48 @@ class Menu(State):
 
 
 class Selection(State):
+    preview_loader = None  # shared between selection screens so decoded previews survive going back to the menu
+
     def __init__(self, surface):
         super().__init__(surface)
+        if Selection.preview_loader is None:
+            Selection.preview_loader = PreviewLoader()
         self.image_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
         self.image_list = self.get_images()
         self.image_index = 0
         self.image = None
-        self.load_image(self.image_list[0])
+        self.preview_path = None
         self.rotate_setting = False
-        if self.image is not None:
-            self.piece_selector = DropDownMenu(self.surface,
-                                               [str(x) for x in Puzzle.get_possible_piece_dims(
-                                                   self.image.get_rect().width, self.image.get_rect().width)],
-                                               self.TEXT_COL,
-                                               (self.surface.get_width() * 4 / 5 + 30, self.surface.get_height() / 3))
+        self.piece_selector = DropDownMenu(self.surface, ["-"], self.TEXT_COL,
+                                           (self.surface.get_width() * 4 / 5 + 30, self.surface.get_height() / 3))
+        self.load_image(self.image_list[0])
         self.play_button = Button(self.surface.get_width() / 2 - 60, self.surface.get_height() * 5 / 6, 120, 50,
                                   "Start", self.font, self.TEXT_COL, self.BUTTON_COL, 2)
         self.rotation_toggle = Button(self.surface.get_width() / 4 + 50, self.surface.get_height() * 5 / 6 + 15,
                                       30, 30, "", self.smallfont, self.TEXT_COL, self.BUTTON_COL)
         self.type_selector = DropDownMenu(self.surface, ["regular", "square"], self.TEXT_COL,
                                           (self.surface.get_width() * 3 / 4, self.surface.get_height() * 5 / 6))
+        self.catalog = SaveCatalog()
+        self._save_key = None
+        self._save_entry = None
+        try:
+            self.catalog.collect_garbage()
+        except (sqlite3.Error, OSError):
+            pass  # without a catalog every puzzle just starts fresh
+
+    def current_save(self):
+        """catalog entry of the save for the selected image, type and piece count, None if there is none"""
+        if self.image_index == len(self.image_list) or not self.piece_selector.selected_option.isdigit():
+            return None
+        key = (self.image_list[self.image_index], self.type_selector.selected_option,
+               int(self.piece_selector.selected_option))
+        if key != self._save_key:
+            try:
+                entries = self.catalog.find(*key)
+            except sqlite3.Error:
+                entries = []
+            self._save_key, self._save_entry = key, entries[0] if entries else None
+        return self._save_entry
 
     def is_image_file(self, filename):
         return filename.lower().endswith(self.image_extensions)
@@ -122,15 +158,23 @@ class Selection(State):
                 pathes.append("resources/" + image)
         return pathes
 
+    def preview_bounds(self):
+        return self.surface.get_width() * 2 / 3, self.surface.get_height() * 2 / 3
+
     def load_image(self, image_path):
-        image = pygame.image.load(image_path).convert()
-        image_width, image_height = image.get_size()
-        boundary_width = self.surface.get_width() * 2 / 3
-        boundary_height = self.surface.get_height() * 2 / 3
-        scale_factor = min(boundary_width / image_width, boundary_height / image_height)
-        new_width = int(image_width * scale_factor)
-        new_height = int(image_height * scale_factor)
-        self.image = pygame.transform.scale(image, (new_width, new_height))
+        """shows image_path as soon as its preview is decoded and starts decoding its neighbours"""
+        self.preview_path = image_path
+        self.image = None
+        self.poll_preview()
+        neighbours = self.image_list[max(self.image_index - 1, 0):self.image_index + 2]
+        self.preview_loader.prefetch([path for path in neighbours if path != image_path], self.preview_bounds())
+
+    def poll_preview(self):
+        if self.image is None and self.preview_path is not None:
+            self.image = self.preview_loader.get(self.preview_path, self.preview_bounds())
+            if self.image is not None:
+                self.piece_selector.set_options([str(amount) for amount, _ in Puzzle.get_possible_piece_dims(
+                    self.image.get_width(), self.image.get_height())])
 
     def handle_events(self, events):
         new_state = None
@@ -144,11 +188,9 @@ class Selection(State):
                         self.image_index = min(self.image_index + 1, len(self.image_list))
                         if self.image_index < len(self.image_list):
                             self.load_image(self.image_list[self.image_index])
-                            if self.image is not None:
-                                self.piece_selector.options = [str(x) for x in Puzzle.get_possible_piece_dims(
-                                    self.image.get_rect().width, self.image.get_rect().width)]
                         else:
                             self.image = None
+                            self.preview_path = None
                     elif event.key == pygame.K_ESCAPE:
                         new_state = Menu(self.surface)
                 case pygame.DROPFILE:
@@ -175,6 +217,14 @@ class Selection(State):
             screen_center_x, screen_center_y = self.surface.get_rect().center
             rect.center = (screen_center_x - 100, screen_center_y)
             self.surface.blit(self.image, rect)
+        elif self.preview_path is not None and not self.preview_loader.failed(self.preview_path,
+                                                                              self.preview_bounds()):
+            boundary_width, boundary_height = self.preview_bounds()
+            loading_rect = pygame.Rect(0, 0, boundary_width, boundary_height)
+            screen_center_x, screen_center_y = self.surface.get_rect().center
+            loading_rect.center = (screen_center_x - 100, screen_center_y)
+            pygame.draw.rect(self.surface, self.BUTTON_COL, loading_rect)
+            self.display_text("Loading...", loading_rect.centerx - 100, loading_rect.centery - 30)
         else:
             drag_rect = pygame.Rect(0, 0, self.surface.get_height() * 2 / 3, self.surface.get_height() * 2 / 3)
             screen_center_x, screen_center_y = self.surface.get_rect().center
@@ -196,35 +246,42 @@ class Selection(State):
                       (top_point[0] + 40, top_point[1])]
             pygame.draw.polygon(self.surface, self.TEXT_COL, points)  # arrow up
 
+    def start_puzzle(self):
+        """Play state of the saved puzzle for the selection if there is one, of a new puzzle otherwise"""
+        puzzle = None
+        save = self.current_save()
+        if save is not None:
+            if self.type_selector.selected_option == 'regular':
+                puzzle = RegularPuzzle.load(save['path'], self.surface)
+            elif self.type_selector.selected_option == 'square':
+                puzzle = SquarePuzzle.load(save['path'], self.surface)
+        if puzzle:
+            return Play.from_existing_puzzle(self.surface, self.theme, puzzle, self.type_selector.selected_option)
+        try:
+            return Play.from_new_puzzle(self.type_selector.selected_option, self.surface, self.theme,
+                                        self.image.get_rect().width, self.image.get_rect().height,
+                                        int(self.piece_selector.selected_option), self.image_list[self.image_index],
+                                        self.rotate_setting)
+        except AttributeError:
+            # show an error
+            return None
+
+    def draw_save_info(self):
+        save = self.current_save()
+        if save is not None:
+            self.display_small_text(f"Saved: {int(save['progress'] * 100)}%  {Stopwatch.format_time(save['elapsed'])}",
+                                    self.surface.get_width() * 4 / 5 + 10, self.surface.get_height() * 5 / 6 - 30)
+
     def draw(self):
         new_state = None
         super().draw()
+        self.poll_preview()
         self.draw_puzzle_image()
         self.draw_arrows()
         if self.play_button.draw(self.surface):
-            if self.image_index != len(self.image_list):
-                puzzle = None
-                if self.type_selector.selected_option == 'regular':
-                    puzzle = RegularPuzzle.load("saves/" + self.type_selector.selected_option +
-                                                self.image_list[self.image_index].replace("resources/", "") +
-                                                self.piece_selector.selected_option + ".pkl", self.surface)
-                elif self.type_selector.selected_option == 'square':
-                    puzzle = SquarePuzzle.load("saves/" + self.type_selector.selected_option +
-                                               self.image_list[self.image_index].replace("resources/", "") +
-                                               self.piece_selector.selected_option + ".pkl", self.surface)
-                if not puzzle:
-                    try:
-                        new_state = Play.from_new_puzzle(self.type_selector.selected_option, self.surface,
-                                                         self.theme,
-                                                         self.image.get_rect().width, self.image.get_rect().height,
-                                                         int(self.piece_selector.selected_option), self.image_list[
-                                                             self.image_index], self.rotate_setting)
-                    except AttributeError:
-                        # show an error
-                        new_state = None
-                else:
-                    new_state = Play.from_existing_puzzle(self.surface, self.theme, puzzle,
-                                                          self.type_selector.selected_option)
+            if self.image_index != len(self.image_list) and self.image is not None:
+                new_state = self.start_puzzle()
+        self.draw_save_info()
         self.piece_selector.draw_dropdown()
         self.type_selector.draw_dropdown()
         self.display_small_text("Rotation", self.surface.get_width() * 5 / 6 - 30, self.surface.get_height() *
@@ -246,9 +303,14 @@ class Selection(State):
 
 
 class Play(State):
+    dirty_rendering = False  # only redraw and update the regions that changed each frame
+    journaling = False  # append every move to a journal instead of only saving the whole puzzle
+    recording_dir = None  # directory to record the input of every played puzzle to, for replay.py
+
     def __init__(self, surface, theme, puzzle, puzz_type='', from_save=False):
         super().__init__(surface, theme)
         self.puzzle = puzzle
+        self.puzzle.request_full_redraw()
         if puzz_type != '' and not from_save:
             self.savefile_path = ("saves/" + puzz_type + puzzle.image_path.replace("resources/", "") +
                                   str(self.puzzle.get_amount()) + ".pkl")
@@ -256,6 +318,12 @@ class Play(State):
             self.puzz_type = puzz_type
         elif from_save:
             self.savefile_path = self.puzzle.save_path
+        if self.journaling and self.puzzle.journal is None:
+            self.puzzle.enable_journal()
+        if self.recording_dir is not None and self.puzzle.recorder is None:
+            os.makedirs(self.recording_dir, exist_ok=True)
+            filename = os.path.join(self.recording_dir, time.strftime("%Y%m%d-%H%M%S") + ".rec")
+            self.puzzle.recorder = EventRecorder(filename, self.puzzle, self.surface.get_size())
 
     @classmethod
     def from_new_puzzle(cls, puzz_type, surface, background_col, size_x, size_y, amount, image_path, rotatable=False):
@@ -272,13 +340,15 @@ class Play(State):
 
     def handle_events(self, events):
         new_state = None
+        if self.puzzle.recorder is not None:
+            self.puzzle.recorder.record(events)
         for event in events:
             match event.type:
                 case pygame.MOUSEBUTTONUP:
                     self.puzzle.handle_click_stop()
                 case pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:
-                        self.puzzle.handle_click(pygame.mouse.get_pos())
+                        self.puzzle.handle_click(event.pos)
                 case pygame.MOUSEMOTION:
                     self.puzzle.move(event.rel)
                 case pygame.KEYDOWN:
@@ -289,21 +359,41 @@ class Play(State):
                     elif event.key == pygame.K_ESCAPE:
                         self.puzzle.pause_stopwatch()
                         new_state = Paused(self.surface, self.puzzle, self.theme)
+                case pygame.VIDEORESIZE | pygame.WINDOWEXPOSED:
+                    self.puzzle.request_full_redraw()
                 case pygame.QUIT:
                     self.puzzle.save_to_file(self.savefile_path)
+                    self.stop_recording()
                     self.quit = True
         return new_state
 
+    def stop_recording(self):
+        if self.puzzle.recorder is not None:
+            self.puzzle.recorder.close()
+            self.puzzle.recorder = None
+
     def draw(self):
-        super().draw()
-        self.puzzle.draw(self.surface, self.TEXT_COL)
+        if self.dirty_rendering:
+            self.update_rects = self.puzzle.draw_dirty(self.surface, self.TEXT_COL, self.BACKGROUND)
+        else:
+            self.puzzle.draw(self.surface, self.TEXT_COL, self.BACKGROUND)
+        self.puzzle.autosave()
         if self.puzzle.is_complete():
+            self.stop_recording()
+            self.puzzle.autosaver.wait()
+            if self.puzzle.journal is not None:
+                self.puzzle.journal.clear()  # closes the handle the puzzle keeps open before the files go
+            else:
+                MoveJournal(self.savefile_path).clear()  # left behind by an earlier session that journaled
             self.puzzle.clearsave(self.savefile_path)
             return Menu(self.surface)
 
     def resize(self):
         return
 
+    def request_full_redraw(self):
+        self.puzzle.request_full_redraw()
+
 
 class Paused(State):
     def __init__(self, surface, puzzle, theme):
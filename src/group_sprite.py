@@ -0,0 +1,56 @@
+import pygame
+
+
+class GroupSprite:
+    """
+    One composited surface for a connected group of pieces, made the first time the group is drawn.
+    Pieces added to the group later are only drawn onto it at the next draw. The surface is made with
+    room to spare around the group, so most merges never copy the old image into a larger one.
+    Moving the sprite only moves it by an offset, the pieces follow when sync is called.
+    The bounds of the group are kept by the puzzle and passed in when drawing.
+    """
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.offset = (0, 0)
+        self._image = None
+        self._origin = (0, 0)  # where the top left of the image lies in piece coordinates
+        self._pending = []  # pieces of the group not drawn onto the image yet
+
+    def add(self, pieces, members):
+        """pieces joined the group, members is the whole group now, the sprite has to be synced"""
+        self.pieces = members
+        if self._image is not None:
+            self._pending.extend(pieces)
+
+    def _compose(self, bounds):
+        if self._image is None:
+            self._pending = list(self.pieces)
+        if self._image is None or not pygame.Rect(self._origin, self._image.get_size()).contains(bounds):
+            area = bounds.inflate(bounds.width // 2, bounds.height // 2)
+            image = pygame.Surface(area.size, pygame.SRCALPHA)
+            if self._image is not None:
+                image.blit(self._image, (self._origin[0] - area.x, self._origin[1] - area.y))
+            self._image, self._origin = image, area.topleft
+        for piece in self._pending:
+            piece.draw(self._image, self._origin)
+        self._pending = []
+
+    def move(self, rel):
+        self.offset = (self.offset[0] + rel[0], self.offset[1] + rel[1])
+
+    def sync(self):
+        """moves the pieces to where the sprite has been dragged, returns how far they moved"""
+        rel = self.offset
+        if rel != (0, 0):
+            for piece in self.pieces:
+                piece.move(rel)
+            self._origin = (self._origin[0] + rel[0], self._origin[1] + rel[1])
+            self.offset = (0, 0)
+        return rel
+
+    def draw(self, surface, bounds):
+        """bounds is the area the pieces cover where they are, the offset of a drag is added to it"""
+        self._compose(bounds)
+        area = bounds.move(-self._origin[0], -self._origin[1])
+        surface.blit(self._image, bounds.move(self.offset), area)
@@ -0,0 +1,124 @@
+import numpy as np
+import pygame
+
+TAB_DEPTH = 0.2  # how far a tab sticks out, as a fraction of the shortest piece side
+TAB_POSITIONS = {1: 0.5, 2: 0.38, 3: 0.62}  # where along the edge each tab family sits
+
+_alphas = {}
+_hit_masks = {}
+
+
+def tab_margin(size):
+    """room a piece needs around its cell on every side for the tabs of its neighbours and its own"""
+    return max(1, int(min(size) * TAB_DEPTH))
+
+
+def alpha(signature, size, rotation=0):
+    """
+    Alpha channel of a piece with the tabs in signature, (top, right, bottom, left) in tab codes,
+    as a uint8 array indexed [x, y] covering the cell of the given size plus tab_margin on every side.
+    rotation is in quarter turns counterclockwise, like the rotation of piece images.
+    """
+    key = (signature, size, rotation % 4)
+    mask = _alphas.get(key)
+    if mask is None:
+        if rotation % 4:
+            mask = np.ascontiguousarray(np.rot90(alpha(signature, size), -(rotation % 4)))
+        else:
+            prepare([signature], size)
+            mask = _alphas[key]
+        _alphas[key] = mask
+    return mask
+
+
+def hit_mask(signature, size, rotation=0):
+    """pygame mask of the opaque pixels of a piece, shared by every piece with the same tabs, size and rotation"""
+    key = (signature, size, rotation % 4)
+    mask = _hit_masks.get(key)
+    if mask is None:
+        shape = alpha(signature, size, rotation)
+        surface = pygame.Surface(shape.shape, pygame.SRCALPHA)
+        pixels = pygame.surfarray.pixels_alpha(surface)
+        pixels[...] = shape
+        del pixels
+        mask = _hit_masks[key] = pygame.mask.from_surface(surface)
+    return mask
+
+
+def prepare(signatures, size):
+    """builds the alpha masks of all signatures for pieces of one size in one batch"""
+    signatures = sorted({signature for signature in signatures if (signature, size, 0) not in _alphas})
+    if not signatures:
+        return
+    knobs, holes, cell = _edge_shapes(size)
+    codes = np.array(signatures, dtype=np.intp)  # one row per signature, one column per side
+    sides = np.arange(4)
+    outward = np.zeros((len(signatures),) + cell.shape, dtype=bool)
+    inward = np.zeros_like(outward)
+    for side in sides:
+        outward |= knobs[side][codes[:, side]]
+        inward |= holes[side][codes[:, side]]
+    masks = ((cell & ~inward) | outward).astype(np.uint8) * 255
+    for signature, mask in zip(signatures, masks):
+        _alphas[(signature, size, 0)] = mask
+
+
+def _edge_shapes(size):
+    """
+    For every side, the area each tab code adds outside the cell (knobs) and takes from inside it (holes).
+    Code c and 7 - c describe the same shape at the same spot of a shared edge, as knob and as hole.
+    """
+    width, height = size
+    margin = tab_margin(size)
+    xs = np.arange(width + 2 * margin)[:, None] + 0.5 - margin
+    ys = np.arange(height + 2 * margin)[None, :] + 0.5 - margin
+    xs, ys = np.broadcast_arrays(xs, ys)
+    cell = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    radius = margin * 0.55
+    neck = radius * 0.5
+    reach = margin - radius  # distance from the edge to the centre of a tab
+
+    def tab(along, across, length, direction, position):
+        """a round tab on an edge, along and across are the coordinates parallel and normal to it"""
+        centre = position * length
+        distance = across * direction
+        head = (along - centre) ** 2 + (distance - reach) ** 2 <= radius ** 2
+        stem = (np.abs(along - centre) <= neck) & (distance >= 0) & (distance <= reach)
+        return head | stem
+
+    # per side: coordinate along the edge, coordinate across it measured from the edge, edge length, outward sign
+    edges = [(xs, ys, width, -1), (ys, xs - width, height, 1), (xs, ys - height, width, 1), (ys, xs, height, -1)]
+    empty = np.zeros(cell.shape, dtype=bool)
+    knobs, holes = [], []
+    for along, across, length, direction in edges:
+        side_knobs, side_holes = [empty] * 7, [empty] * 7
+        for code, position in TAB_POSITIONS.items():
+            side_knobs[code] = tab(along, across, length, direction, position)
+            side_holes[7 - code] = tab(along, across, length, -direction, position)
+        knobs.append(np.stack(side_knobs))
+        holes.append(np.stack(side_holes))
+    return knobs, holes, cell
+
+
+def cut(image, signature):
+    """
+    The shaped piece for the cell image, a subsurface of the whole puzzle image, with the pixels
+    around the cell that its knobs cover and transparency where its holes and the neighbouring knobs are.
+    """
+    width, height = image.get_size()
+    margin = tab_margin((width, height))
+    parent = image.get_abs_parent()
+    offset_x, offset_y = image.get_abs_offset()
+    area = pygame.Rect(offset_x - margin, offset_y - margin, width + 2 * margin, height + 2 * margin)
+    shaped = pygame.Surface(area.size, pygame.SRCALPHA)
+    source = area.clip(parent.get_rect())
+    shaped.blit(parent, (source.x - area.x, source.y - area.y), source)
+    pixels = pygame.surfarray.pixels_alpha(shaped)
+    pixels[...] = alpha(signature, (width, height))
+    del pixels  # releases the lock on shaped
+    return shaped
+
+
+def clear():
+    _alphas.clear()
+    _hit_masks.clear()
@@ -0,0 +1,74 @@
+import os
+import struct
+
+
+class MoveJournal:
+    """
+    Append-only log of fixed-size records next to a save file.
+    Every record holds absolute state (a position, a direction, a connection), so replaying a record
+    on a checkpoint that already contains it changes nothing.
+    While a checkpoint is being written the current log is rolled over to a second file,
+    which is only deleted once the checkpoint is on disk.
+    """
+    RECORD = struct.Struct("<BhhhhiiI")  # op, row, col, other row, other col, x, y, elapsed seconds
+    DROP = 1  # piece (row, col) of the dropped group ended at (x, y)
+    ROTATE = 2  # piece (row, col) of the active group now has direction x
+    CONNECT = 3  # piece (row, col) was connected to (other row, other col) at relative position (x, y)
+
+    def __init__(self, save_path):
+        self.path = save_path + ".journal"
+        self.rolled_path = save_path + ".journal.1"
+        self.records = self._count(self.path)
+        self._file = None
+
+    def _count(self, path):
+        return os.path.getsize(path) // self.RECORD.size if os.path.exists(path) else 0
+
+    def append(self, op, position, other=(0, 0), x=0, y=0, elapsed=0):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        self._file.write(self.RECORD.pack(op, position[0], position[1], other[0], other[1], int(x), int(y),
+                                          int(elapsed)))
+        self._file.flush()
+        self.records += 1
+
+    def roll(self):
+        """moves the current log aside before a checkpoint is taken, new records go to a fresh log"""
+        self.close()
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.rolled_path):  # the previous checkpoint never finished, keep both
+            with open(self.rolled_path, 'ab') as rolled, open(self.path, 'rb') as current:
+                rolled.write(current.read())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.rolled_path)
+        self.records = 0
+
+    def drop_rolled(self):
+        """called once the checkpoint that includes the rolled log is written"""
+        if os.path.exists(self.rolled_path):
+            os.remove(self.rolled_path)
+
+    def clear(self):
+        self.close()
+        for path in (self.rolled_path, self.path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.records = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read(self):
+        """yields (op, position, other, x, y, elapsed) from the rolled log and then the current one"""
+        for path in (self.rolled_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as file:
+                data = file.read()
+            usable = len(data) - len(data) % self.RECORD.size  # a crash can leave half a record behind
+            for op, row, col, other_row, other_col, x, y, elapsed in self.RECORD.iter_unpack(data[:usable]):
+                yield op, (row, col), (other_row, other_col), x, y, elapsed
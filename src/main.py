@@ -1,10 +1,13 @@
+import sys
 import pygame
-from game_state import Menu
+from game_state import Menu, Play, Selection
+from src import audio_handler, custom_timer, frame_profiler
 
 
 class Game:
     def __init__(self):
         pygame.init()
+        audio_handler.init()
         self.SCREEN_WIDTH = 1200
         self.SCREEN_HEIGHT = 900
         self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.RESIZABLE)
@@ -15,11 +18,23 @@ class Game:
     def run_game(self):
         run = True
         while run:
-            self.game_clock.tick(100)
+            custom_timer.timers.tick(self.game_clock.tick(100))
+            frame_profiler.begin_frame()
+            state_name = type(self.game_state).__name__
             events = pygame.event.get()
-            next_state_1 = self.game_state.handle_events(events)
-            next_state_2 = self.game_state.draw()
-            self.game_state.resize()
+            self.handle_profiler_keys(events)
+            with frame_profiler.section(state_name + ".handle_events"):
+                next_state_1 = self.game_state.handle_events(events)
+            with frame_profiler.section(state_name + ".draw"):
+                next_state_2 = self.game_state.draw()
+            with frame_profiler.section(state_name + ".resize"):
+                self.game_state.resize()
+
+            update_rects = self.game_state.get_update_rects()
+            if frame_profiler.enabled:
+                overlay_rect = frame_profiler.draw_overlay(self.screen)
+                if update_rects is not None:
+                    update_rects = update_rects + [overlay_rect]
 
             if self.game_state.quit:
                 run = False
@@ -27,10 +42,33 @@ class Game:
                 self.game_state = next_state_1
             elif next_state_2 is not None:
                 self.game_state = next_state_2
-            pygame.display.update()
+            with frame_profiler.section("display.update"):
+                if update_rects is None:
+                    pygame.display.update()
+                else:
+                    pygame.display.update(update_rects)
+            frame_profiler.end_frame()
+        if Selection.preview_loader is not None:
+            Selection.preview_loader.shutdown()  # its worker threads would keep the process alive after the window closed
         pygame.quit()
 
+    def handle_profiler_keys(self, events):
+        """
+        F3 switches the frame profiler and its overlay on and off,
+        F4 dumps the recorded frames as a trace whose file name the overlay shows
+        """
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                frame_profiler.toggle()
+                self.game_state.request_full_redraw()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                frame_profiler.dump_trace()
+
 
 if __name__ == "__main__":
+    Play.dirty_rendering = "--dirty-rects" in sys.argv
+    Play.journaling = "--journal" in sys.argv
+    Play.recording_dir = "recordings" if "--record" in sys.argv else None
+    frame_profiler.set_enabled("--profile" in sys.argv)
     game = Game()
     game.run_game()
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+
+class PreviewLoader:
+    """
+    Decodes and scales images on a thread pool so browsing never waits for a decode.
+    Scaled previews are kept in a bounded LRU cache and written to an on-disk thumbnail cache
+    keyed by path, modification time and target size.
+    """
+
+    def __init__(self, cache_dir="saves/thumbnails", max_cached=8, workers=2):
+        self.cache_dir = cache_dir
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._failed = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+
+    def get(self, path, bounds):
+        """returns the scaled preview, or None while it is still loading or if it could not be loaded"""
+        key = (path, (int(bounds[0]), int(bounds[1])))
+        self._collect(key)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if key not in self._pending and key not in self._failed:
+            self._pending[key] = self._executor.submit(self._load, *key)
+        return None
+
+    def _collect(self, requested):
+        """
+        Moves every finished load into the LRU cache, so prefetched previews nobody asks for again,
+        say after a resize changed the bounds, are evicted like the rest. The requested one goes in last.
+        """
+        done = sorted((key for key, future in self._pending.items() if future.done()), key=lambda key: key == requested)
+        for key in done:
+            try:
+                image = self._pending.pop(key).result()
+            except (pygame.error, OSError):
+                self._failed.add(key)
+                continue
+            if pygame.display.get_surface() is not None:
+                image = image.convert()
+            self._cache[key] = image
+            if len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def failed(self, path, bounds):
+        return (path, (int(bounds[0]), int(bounds[1]))) in self._failed
+
+    def prefetch(self, paths, bounds):
+        for path in paths:
+            key = (path, (int(bounds[0]), int(bounds[1])))
+            if key not in self._cache and key not in self._pending and key not in self._failed:
+                self._pending[key] = self._executor.submit(self._load, *key)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _thumbnail_path(self, path, bounds):
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{bounds[0]}x{bounds[1]}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".png")
+
+    def _load(self, path, bounds):
+        thumbnail_path = self._thumbnail_path(path, bounds)
+        if os.path.exists(thumbnail_path):
+            try:
+                return pygame.image.load(thumbnail_path)
+            except pygame.error:
+                pass  # a broken thumbnail is simply rebuilt
+        image = pygame.image.load(path)
+        image = pygame.transform.scale(image, self.scaled_size(image.get_size(), bounds))
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp.png"
+            pygame.image.save(image, tmp_path)
+            os.replace(tmp_path, thumbnail_path)
+        except (pygame.error, OSError):
+            pass  # the preview still works without the disk cache
+        return image
+
+    @staticmethod
+    def scaled_size(size, bounds):
+        image_width, image_height = size
+        scale_factor = min(bounds[0] / image_width, bounds[1] / image_height)
+        return int(image_width * scale_factor), int(image_height * scale_factor)
@@ -1,71 +1,353 @@
+import functools
+import hashlib
+import itertools
 import math
-import pickle
+import os
+import random
+import sqlite3
+import numpy as np
 import pygame.image
 
 from src.audio_handler import play_sound
+from src.autosave import Autosaver, write_atomic
 from src.custom_timer import Timer
+from src.disjoint_set import DisjointSet
+from src import frame_profiler
+from src.group_sprite import GroupSprite
+from src.journal import MoveJournal
+from src.save_catalog import SaveCatalog
+from src.spatial_hash import SpatialHash
 from src.stopwatch import Stopwatch
+from src.text_cache import get_font
 from abc import ABC, abstractmethod
 
+MAX_PIECES = 1500
+MAX_PIECE_RATIO = 1.6
+SNAP_TOLERANCE = 10
+
+
+def within_ratio(w, h):
+    ratio = w / h if w >= h else h / w
+    return ratio <= MAX_PIECE_RATIO
+
+
+@functools.lru_cache(maxsize=64)
+def piece_grids(width, height):
+    """
+    Every piece count between 2 and MAX_PIECES an image of this size can be cut into,
+    with the (cols, rows) grid giving the squarest pieces for that count.
+    For each column count the valid row counts form one range around the rows that make square pieces,
+    so only the edges of that range need the exact ratio check.
+    """
+    grids = {}
+    for cols in range(1, min(int(width), MAX_PIECES) + 1):
+        piece_width = width / cols
+        max_rows = min(int(height), MAX_PIECES // cols)
+        lowest = max(1, math.floor(height / (piece_width * MAX_PIECE_RATIO)))
+        highest = min(max_rows, math.ceil(height * MAX_PIECE_RATIO / piece_width))
+        for rows in range(lowest, highest + 1):
+            piece_height = height / rows
+            if cols * rows < 2 or not within_ratio(piece_width, piece_height):
+                continue
+            squareness = max(piece_width, piece_height) / min(piece_width, piece_height)
+            best = grids.get(cols * rows)
+            if best is None or squareness < best[0]:
+                grids[cols * rows] = (squareness, (cols, rows))
+    return tuple((amount, grids[amount][1]) for amount in sorted(grids))
+
 
 class Puzzle(ABC):
+    SAVE_VERSION = 2
+    PIECE_CLASS = None
+
+    def __init__(self, surface, size_x, size_y, amount, image_path, rotatable, seed=None):
+        self._init_state(size_x, size_y, image_path, rotatable, seed)
+        piece_dims = self.__set_piece_dims(size_x, size_y, amount)
+        self._spatial = SpatialHash(max(piece_dims))
+        self.create_pieces(surface, self.rowcols, piece_dims)
+        self.save_path = f"{self.image_path}{self.rowcols[0] * self.rowcols[1]}.pkl"
 
-    def __init__(self, surface, size_x, size_y, amount, image_path, rotatable):
+    @classmethod
+    def from_saved(cls, data, surface):
+        """
+        Builds a puzzle straight from serialized data, skips generating the random pieces
+        the regular constructor would make only to have them replaced.
+        """
+        puzzle = cls.__new__(cls)
+        puzzle._init_state(data['size_x'], data['size_y'], data['image_path'], data['rotatable'], data.get('seed'))
+        puzzle.rowcols = tuple(data['rowcols'])
+        puzzle._spatial = SpatialHash(max(puzzle.get_piece_dims()))
+        puzzle._restore_state(data, cls.PIECE_CLASS)
+        return puzzle
+
+    def _init_state(self, size_x, size_y, image_path, rotatable, seed):
+        self._groups = DisjointSet()
+        self._positions = {}
+        self._draw_order = {}  # group root -> z, insertion order is bottom to top
+        self._z_counter = itertools.count()
+        self._spatial = SpatialHash(1)
+        self._sprites = {}  # group root -> GroupSprite, only for groups of more than one piece that were drawn
+        self._bounds = {}  # group root -> area its pieces cover, only for groups of more than one piece
+        self._open_edges = {}  # group root -> {(position, neighbour position)} leaving the group, singletons are lazy
+        self._dirty_rects = []
+        self._touched = set()
+        self._full_redraw = True
+        self._static_layer = None
+        self._active_bounds = None
+        self._stopwatch_rect = None
+        self._stopwatch_text = None
+        self._stopwatch_surface = None
+        self._stopwatch_col = None
+        self._surface_size = None
         self.pieces = {}
         self.rowcols = ()
-        self.connected_groups = []
         self.active = None
         self.drag_timer = Timer(200)
         self.click = False
         self.rotatable = rotatable
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
         self.image_path = image_path
+        self._image_hash = None
         self.image = pygame.transform.scale(pygame.image.load(image_path), (size_x, size_y))
-        piece_dims = self.__set_piece_dims(size_x, size_y, amount)
-        self.create_pieces(surface, self.rowcols, piece_dims)
         self.stopwatch = Stopwatch()
-        self.save_path = f"{self.image_path}{self.rowcols[0] * self.rowcols[1]}.pkl"
+        self.autosaver = Autosaver()
+        self.unsaved_changes = False
+        self.journal = None
+        self.journal_compact_after = 0
+        self._replaying = False
+        self.recorder = None  # records the input of the Play states showing this puzzle
+        self.save_path = ""
+
+    @property
+    def pieces(self):
+        return self._pieces
+
+    @pieces.setter
+    def pieces(self, pieces):
+        self._pieces = pieces
+        self._positions = {piece: position for position, piece in pieces.items()}
+        self._groups.clear()
+        self._sprites.clear()
+        self._bounds.clear()
+        self._open_edges.clear()
+        self._draw_order = {piece: next(self._z_counter) for piece in pieces.values()}
+        self._spatial.clear()
+        self._update_spatial(pieces.values())
+        self.request_full_redraw()
+
+    def add_piece(self, position, piece):
+        self._pieces[position] = piece
+        self._positions[piece] = position
+        self._draw_order[piece] = next(self._z_counter)
+        self._spatial.insert(piece, piece.get_draw_rect())
+
+    @property
+    def connected_groups(self):
+        return self._groups.groups()
 
     def get_amount(self):
         return self.rowcols[0] * self.rowcols[1]
 
-    def draw(self, surface, text_col):
-        visited_groups = []
-        for piece in self.pieces.values():
-            group = self.find_group(piece)
-            if group is None:
-                piece.relocate_inside_surface(surface)
-                piece.draw(surface)
-            else:
-                if group in visited_groups:
-                    continue
-                all_outside = True
-                for grp_piece in group:
-                    if grp_piece.is_in_surface(surface):
-                        all_outside = False
-                        break
-                if all_outside:
-                    movement_vector = next(iter(group)).relocate_inside_surface(surface)
-                    for grp_piece in group:
-                        if grp_piece != next(iter(group)):
-                            grp_piece.move(movement_vector)
-                for grp_piece in group:
-                    grp_piece.draw(surface)
-                visited_groups.append(group)
-        self.draw_stopwatch(surface, text_col)
+    def draw(self, surface, text_col, background=None):
+        """
+        Without a background every group is drawn every frame.
+        With a background the groups that are not being dragged come from a cached static layer,
+        so a frame is one full-surface blit plus the pieces of the active group.
+        """
+        if background is None:
+            self._relocate_groups(self._draw_order, surface)
+            with frame_profiler.section("Puzzle.pieces"):
+                for root in self._draw_order:
+                    self._draw_group(root, surface)
+        else:
+            active_root = self._groups.find(self.active) if self.active else None
+            if active_root is not None:
+                self._relocate_groups([active_root], surface)
+            static_layer = self._get_static_layer(surface, background)
+            with frame_profiler.section("Puzzle.pieces"):
+                surface.blit(static_layer, (0, 0))
+                if active_root is not None:
+                    self._draw_group(active_root, surface)
+        with frame_profiler.section("Puzzle.stopwatch"):
+            self._stopwatch_rect = self.draw_stopwatch(surface, text_col)
+        self._active_bounds = self.group_bounds(self.active) if self.active else None
+        self._dirty_rects.clear()
+        self._touched.clear()
+        self._full_redraw = False
+        self._surface_size = surface.get_size()
+
+    def _draw_group(self, root, surface):
+        if self._groups.size(root) == 1:
+            root.draw(surface)
+        else:
+            self._sprite_for(root).draw(surface, self._group_rect(root))
+
+    def _sprite_for(self, root):
+        sprite = self._sprites.get(root)
+        if sprite is None:
+            sprite = self._sprites[root] = GroupSprite(self._groups.members(root))
+        return sprite
+
+    def _sync_group(self, piece):
+        """brings the piece rects of a dragged group up to date with its sprite"""
+        root = self._groups.find(piece)
+        sprite = self._sprites.get(root)
+        if sprite is not None:
+            self._sync_sprite(root, sprite)
+
+    def _sync_sprite(self, root, sprite):
+        rel = sprite.sync()
+        bounds = self._bounds.get(root)
+        if bounds is not None:
+            bounds.move_ip(rel)
+
+    def sync_pieces(self):
+        for root, sprite in self._sprites.items():
+            self._sync_sprite(root, sprite)
+
+    def _get_static_layer(self, surface, background):
+        if self._static_layer is None or self._static_layer.get_size() != surface.get_size():
+            with frame_profiler.section("Puzzle.static_layer"):
+                self._static_layer = self._build_static_layer(surface, background)
+        return self._static_layer
+
+    def _build_static_layer(self, surface, background):
+        layer = pygame.Surface(surface.get_size(), 0, surface)
+        layer.fill(background)
+        active_root = self._groups.find(self.active) if self.active else None
+        roots = [root for root in self._draw_order if root is not active_root]
+        self._relocate_groups(roots, layer)
+        for root in roots:
+            self._draw_group(root, layer)
+        return layer
+
+    def draw_dirty(self, surface, text_col, background):
+        """
+        Redraws only the regions that changed since the last frame.
+        Returns the list of rects to pass to pygame.display.update, or None after a full redraw.
+        """
+        if self._full_redraw or surface.get_size() != self._surface_size:
+            surface.fill(background)
+            self.draw(surface, text_col, background)
+            return None
+        dirty = self._collect_dirty_rects(surface)
+        redraw_stopwatch = (self.stopwatch.get_elapsed_time() != self._stopwatch_text or
+                            self._stopwatch_rect.collidelist(dirty) != -1)
+        if redraw_stopwatch and self._stopwatch_rect:
+            dirty.append(self._stopwatch_rect)
+        screen_rect = surface.get_rect()
+        if sum(rect.width * rect.height for rect in dirty) > screen_rect.width * screen_rect.height // 2:
+            self._full_redraw = True
+            return self.draw_dirty(surface, text_col, background)
+
+        with frame_profiler.section("Puzzle.pieces"):
+            self._redraw_rects(surface, background, dirty)
+        if redraw_stopwatch:
+            with frame_profiler.section("Puzzle.stopwatch"):
+                self._stopwatch_rect = self.draw_stopwatch(surface, text_col)
+            dirty.append(self._stopwatch_rect)
+        return dirty
+
+    def _collect_dirty_rects(self, surface):
+        """relocates the groups that moved off surface and returns the changed regions on it, then forgets them"""
+        with frame_profiler.section("Puzzle.relocate"):
+            for piece in self._touched | ({self.active} if self.active else set()):
+                root = self._groups.find(piece)
+                group = self._groups.members(root)
+                bounds = self.group_bounds(root)
+                if self._relocate_group(root, group, surface):
+                    self._dirty_rects += [bounds, self.group_bounds(root)]
+        if self.active:
+            active_bounds = self.group_bounds(self.active)
+            if active_bounds != self._active_bounds:
+                self._dirty_rects += [self._active_bounds, active_bounds]
+            self._active_bounds = active_bounds
+        else:
+            self._active_bounds = None
+        screen_rect = surface.get_rect()
+        dirty = [rect.clip(screen_rect) for rect in self._dirty_rects if rect]
+        self._dirty_rects.clear()
+        self._touched.clear()
+        return [rect for rect in dirty if rect.width and rect.height]
+
+    def _redraw_rects(self, surface, background, dirty):
+        """restores every dirty rect from the static layer and draws the dragged group over it where they meet"""
+        static_layer = self._get_static_layer(surface, background)
+        active_root = self._groups.find(self.active) if self.active else None
+        for rect in dirty:
+            surface.set_clip(rect)
+            surface.blit(static_layer, rect, rect)
+            if active_root is not None and self.group_bounds(active_root).colliderect(rect):
+                self._draw_group(active_root, surface)
+            surface.set_clip(None)
+
+    def request_full_redraw(self):
+        self._full_redraw = True
+        self._static_layer = None
+
+    def _mark_dirty(self, piece):
+        self._dirty_rects.append(self.group_bounds(piece))
+        self._touched.add(piece)
+
+    def group_bounds(self, piece):
+        """the area the group of piece covers on screen, following a drag that has not been synced yet"""
+        root = self._groups.find(piece)
+        sprite = self._sprites.get(root)
+        bounds = self._group_rect(root)
+        return bounds.move(sprite.offset) if sprite is not None else bounds.copy()
+
+    def _group_rect(self, root):
+        """the area the pieces of the group of root cover where they are, kept up to date for groups"""
+        if self._groups.size(root) == 1:
+            return root.get_draw_rect()
+        bounds = self._bounds.get(root)
+        if bounds is None:
+            rects = [piece.get_draw_rect() for piece in self._groups.members(root)]
+            bounds = self._bounds[root] = rects[0].unionall(rects[1:])
+        return bounds
+
+    def _relocate_groups(self, roots, surface):
+        with frame_profiler.section("Puzzle.relocate"):
+            for root in roots:
+                self._relocate_group(root, self._groups.members(root), surface)
+
+    def _relocate_group(self, root, group, surface):
+        """moves a group that ended up completely outside the surface back in, returns whether it moved"""
+        bounds = self.group_bounds(root)
+        surface_width, surface_height = surface.get_size()
+        if bounds.right >= 0 and bounds.left <= surface_width and bounds.bottom >= 0 and bounds.top <= surface_height:
+            return False
+        self._sync_group(root)
+        old_topleft = root.piece.topleft
+        root.relocate_inside_surface(surface)
+        movement_vector = (root.piece.x - old_topleft[0], root.piece.y - old_topleft[1])
+        for grp_piece in group:
+            if grp_piece is not root:
+                grp_piece.move(movement_vector)
+        self._sprites.pop(root, None)
+        self._bounds.pop(root, None)
+        self._update_spatial(group)
+        if not self.active or self._groups.find(self.active) is not root:
+            self._static_layer = None
+        return True
 
     def draw_stopwatch(self, surface, text_col):
-        font = pygame.font.SysFont("arialblack", 20)
-        text = font.render(self.stopwatch.get_elapsed_time(), True, text_col)
-        surface.blit(text, (surface.get_width() - 80, 0))
+        text = self.stopwatch.get_elapsed_time()
+        if text != self._stopwatch_text or text_col != self._stopwatch_col or self._stopwatch_surface is None:
+            # rendered here instead of the shared text cache, every second would push a new entry into it
+            self._stopwatch_surface = get_font("arialblack", 20).render(text, True, text_col)
+            self._stopwatch_text, self._stopwatch_col = text, text_col
+        return surface.blit(self._stopwatch_surface, (surface.get_width() - 80, 0))
 
     def pause_stopwatch(self):
         self.stopwatch.pause_toggle()
 
     def __set_piece_dims(self, width, height, amount):
-
-        def within_ratio(w, h):
-            ratio = w / h if w >= h else h / w
-            return 0.6 <= ratio <= 1.6
+        grid = dict(piece_grids(width, height)).get(amount)
+        if grid is not None:
+            self.rowcols = grid
+            return width / grid[0], height / grid[1]
 
         def factor_pairs(n):
             return [(i, n // i) for i in range(1, int(math.sqrt(n)) + 1) if n % i == 0]
@@ -81,132 +363,311 @@ class Puzzle(ABC):
 
     @staticmethod
     def get_possible_piece_dims(width, height):
-        def within_ratio(w, h):
-            ratio = w / h if w >= h else h / w
-            return 0.6 <= ratio <= 1.6
-
-        possible_amounts = set()
-        max_pieces = 1500
-
-        for i in range(1, int(width) + 1):
-            piece_width = width / i
-            for j in range(1, int(height) + 1):
-                piece_height = height / j
-                if within_ratio(piece_width, piece_height):
-                    pieces_count = i * j
-                    if 1 < pieces_count <= max_pieces:
-                        possible_amounts.add(pieces_count)
-                    else:
-                        break
-
-        return sorted(possible_amounts)
+        """sorted list of (piece count, (cols, rows)), memoized per image size"""
+        return list(piece_grids(width, height))
 
     def find_position(self, piece):
-        for position, p in self.pieces.items():
-            if p == piece:
-                return position
-        return None
+        return self._positions.get(piece)
 
     def get_piece_image(self, row, col, width, height):
         return self.image.subsurface(pygame.Rect(col * width, row * height, width, height))
 
+    def get_piece_dims(self):
+        return self.image.get_width() / self.rowcols[0], self.image.get_height() / self.rowcols[1]
+
+    def get_image_hash(self):
+        if self._image_hash is None:
+            self._image_hash = self.hash_image(self.image_path)
+        return self._image_hash
+
+    @staticmethod
+    def hash_image(image_path):
+        with open(image_path, 'rb') as file:
+            return hashlib.sha1(file.read()).hexdigest()
+
     def rotate(self, clockwise):
         if self.active and self.rotatable:
-            group = self.find_group(self.active)
-            if group:
-                for piece in group:
-                    piece.rotate(clockwise)
-            else:
-                self.active.rotate(clockwise)
-
-    def check_collisions(self, piece):
-        piece_row, piece_col = self.find_position(piece)
-        neighbors = [(piece_row-1, piece_col), (piece_row+1, piece_col),
-                     (piece_row, piece_col-1), (piece_row, piece_col+1)]
-        piece_group = self.find_group(piece)
-        for neighbor_loc in neighbors:
-            neighbor = self.pieces.get(neighbor_loc)
-            if (neighbor and (piece_group is None or neighbor not in piece_group) and
-                    piece.check_collision(neighbor, (neighbor_loc[0] - piece_row, neighbor_loc[1] - piece_col))):
-                self.connect_pieces(piece, neighbor, (neighbor_loc[0] - piece_row, neighbor_loc[1] - piece_col))
+            self._mark_dirty(self.active)
+            self._rotate_group(self.active, clockwise)
+            self._mark_dirty(self.active)
+            self._journal(MoveJournal.ROTATE, self.active, x=self.active.direction)
+            self.unsaved_changes = True
+
+    def _rotate_group(self, piece, clockwise):
+        group = self.find_group(piece)
+        if group:
+            self._sync_group(piece)
+            for grp_piece in group:
+                grp_piece.rotate(clockwise)
+            self._sprites.pop(self._groups.find(piece), None)
+            self._bounds.pop(self._groups.find(piece), None)
+        else:
+            piece.rotate(clockwise)
 
     def connect_pieces(self, piece1, piece2, rel_pos):
-        play_sound("resources/piece_click.mp3")
-        group1, group2 = self.find_group(piece1), self.find_group(piece2)
+        if not self._replaying:
+            play_sound("resources/piece_click.mp3")
+        if self._groups.find(piece1) is self._groups.find(piece2):
+            return
+        self._journal(MoveJournal.CONNECT, piece1, self.find_position(piece2), rel_pos[0], rel_pos[1])
+        self._sync_group(piece1)
+        self._sync_group(piece2)
+        # the smaller group is re-based onto the larger one, so a merge moves as few pieces as possible
+        if self._groups.size(piece1) > self._groups.size(piece2):
+            piece1, piece2, rel_pos = piece2, piece1, (-rel_pos[0], -rel_pos[1])
+        self._mark_dirty(piece1)
         rel_change = piece1.attach_to_piece(piece2, rel_pos)
-        if group1 and group2:
-            if group1 != group2:
-                for piece in group1:
-                    if piece != piece1:
-                        piece.move(rel_change)
-                group1.update(group2)
-                self.connected_groups.remove(group2)
-        elif group1:
-            for piece in group1:
-                if piece != piece1:
-                    piece.move(rel_change)
-            group1.add(piece2)
-        elif group2:
-            group2.add(piece1)
-        else:
-            self.connected_groups.append({piece1, piece2})
+        root1 = self._groups.find(piece1)
+        group1 = self._groups.members(root1)
+        for piece in group1:
+            if piece is not piece1:
+                piece.move(rel_change)
+        self._sprites.pop(root1, None)
+        if root1 in self._bounds:
+            self._bounds[root1].move_ip(rel_change)
+        self._update_spatial(group1)
+        self._join(piece1, piece2)
+
+    def _join(self, piece1, piece2):
+        for piece in (piece1, piece2):
+            self._sync_group(piece)
+        root1, root2 = self._groups.find(piece1), self._groups.find(piece2)
+        bounds = self._group_rect(root1).union(self._group_rect(root2))
+        # the larger group keeps its composited image, only the pieces of the smaller one are added to it
+        larger, smaller = (root1, root2) if self._groups.size(root1) >= self._groups.size(root2) else (root2, root1)
+        sprite = self._sprites.pop(larger, None)
+        added = tuple(self._groups.members(smaller))
+        root, absorbed = self._union(piece1, piece2)
+        if absorbed is not None:
+            if sprite is not None:
+                sprite.add(added, self._groups.members(root))
+                self._sprites[root] = sprite
+            self._bounds[root] = bounds
+            self.raise_group(root)
+            self._static_layer = None
+
+    def _union(self, piece1, piece2):
+        """joins the groups of both pieces in the index, returns (root, absorbed root or None)"""
+        root, absorbed = self._groups.union(piece1, piece2)
+        if absorbed is not None:
+            self._sprites.pop(absorbed, None)
+            self._bounds.pop(absorbed, None)
+            self._draw_order.pop(absorbed, None)
+            self._merge_open_edges(root, absorbed)
+        return root, absorbed
+
+    def open_edges(self, piece):
+        """(position, neighbour position) for every grid edge between the group of piece and a piece outside it"""
+        root = self._groups.find(piece)
+        edges = self._open_edges.get(root)
+        return edges if edges is not None else self._singleton_edges(root)
+
+    def _merge_open_edges(self, root, absorbed):
+        """edges of the smaller side either close against the larger side or stay open in the merged group"""
+        edges = (self._open_edges.pop(root, None) or self._singleton_edges(root),
+                 self._open_edges.pop(absorbed, None) or self._singleton_edges(absorbed))
+        small, large = sorted(edges, key=len)
+        for position, neighbour in small:
+            if (neighbour, position) in large:
+                large.discard((neighbour, position))
+            else:
+                large.add((position, neighbour))
+        self._open_edges[root] = large
+
+    def _singleton_edges(self, piece):
+        """the open edges of a piece on its own only depend on where it sits in the grid"""
+        row, col = self.find_position(piece)
+        return {((row, col), neighbour) for neighbour in ((row - 1, col), (row + 1, col), (row, col - 1),
+                                                          (row, col + 1)) if neighbour in self.pieces}
+
+    def snap_group(self, piece):
+        """
+        Connects the group of piece to every neighbour lying where it belongs. Only the open edges of the
+        group are looked at, and they are filtered in one vectorized pass before the exact check.
+        """
+        edges = list(self.open_edges(piece))
+        if not edges:
+            return
+        pairs = [(self.pieces[position], self.pieces[neighbour]) for position, neighbour in edges]
+        offsets = np.array([(neighbour[0] - position[0], neighbour[1] - position[1]) for position, neighbour in edges])
+        geometry = np.array([(p.piece.x, p.piece.y, p.get_width(), p.get_height(), p.direction,
+                              n.piece.x, n.piece.y, n.direction) for p, n in pairs])
+        x, y, width, height, direction, neighbour_x, neighbour_y, neighbour_direction = geometry.T
+        close = ((direction == neighbour_direction) &
+                 (np.abs(neighbour_x - (x + offsets[:, 1] * width)) <= SNAP_TOLERANCE) &
+                 (np.abs(neighbour_y - (y + offsets[:, 0] * height)) <= SNAP_TOLERANCE))
+        for index in np.flatnonzero(close):
+            group_piece, neighbour = pairs[index]
+            rel_pos = tuple(int(offset) for offset in offsets[index])
+            # an earlier snap in this pass moved the group, so the candidate is checked again where it is now
+            if (self._groups.find(group_piece) is not self._groups.find(neighbour) and
+                    group_piece.check_collision(neighbour, rel_pos, SNAP_TOLERANCE)):
+                self.connect_pieces(group_piece, neighbour, rel_pos)
+
+    def raise_group(self, piece):
+        """moves the group of piece to the top of the draw order"""
+        root = self._groups.find(piece)
+        self._draw_order.pop(root, None)
+        self._draw_order[root] = next(self._z_counter)
+        self._mark_dirty(root)
+        self._static_layer = None
+
+    def _update_spatial(self, pieces):
+        for piece in pieces:
+            self._spatial.update(piece, piece.get_draw_rect())
+
+    def piece_at(self, pos):
+        """returns the topmost piece under pos, or None"""
+        top_piece, top_z = None, -1
+        for piece in self._spatial.query_point(pos):
+            z = self._draw_order[self._groups.find(piece)]
+            if z > top_z and piece.click(pos):
+                top_piece, top_z = piece, z
+        return top_piece
 
     def move(self, rel):
         if self.active:
             self.stopwatch.start()
-            group = self.find_group(self.active)
-            if group:
-                for p in group:
-                    p.move(rel)
+            if self.find_group(self.active):
+                self._sprite_for(self._groups.find(self.active)).move(rel)
             else:
                 self.active.move(rel)
 
     def find_group(self, piece):
-        for group in self.connected_groups:
-            if piece in group:
-                return group
-        return None
+        group = self._groups.members(piece)
+        return group if len(group) > 1 else None
 
     def handle_click(self, pos):
         if not self.click:  # either click to pickup or drop
             self.click = True
             if not self.active:
-                for piece in self.pieces.values():
-                    if piece.click(pos):
-                        self.active = piece
-                        self.drag_timer.start()
-                        break
+                piece = self.piece_at(pos)
+                if piece:
+                    self.active = piece
+                    self.raise_group(piece)
+                    self.drag_timer.start()
             else:
-                group = self.find_group(self.active)
-                if group:
-                    loop_group = group.copy()
-                    for piece in loop_group:
-                        self.check_collisions(piece)
-                else:
-                    self.check_collisions(self.active)
-                self.active = None
+                self.drop_active()
 
     def handle_click_stop(self):
-        if self.drag_timer.is_time_up():  # dragging is active
-            group = self.find_group(self.active)
-            if group:
-                loop_group = group.copy()
-                for piece in loop_group:
-                    self.check_collisions(piece)
-            else:
-                self.check_collisions(self.active)
-            self.active = None
+        if self.drag_timer.is_time_up() and self.active:  # dragging is active
+            self.drop_active()
         self.drag_timer.stop()
         self.click = False
 
+    def drop_active(self):
+        # the dragged group only catches up with its sprite and the spatial index once it is put down
+        self._sync_group(self.active)
+        self._update_spatial(self._groups.members(self.active))
+        self._mark_dirty(self.active)
+        self.snap_group(self.active)
+        self._mark_dirty(self.active)
+        self._journal(MoveJournal.DROP, self.active, x=self.active.piece.x, y=self.active.piece.y)
+        self.active = None
+        self._static_layer = None
+        self.unsaved_changes = True
+
     def is_complete(self):
-        return len(self.connected_groups) == 1 and len(self.connected_groups[0]) == len(self.pieces)
+        first = next(iter(self.pieces.values()), None)
+        return first is not None and len(self.pieces) > 1 and self._groups.size(first) == len(self.pieces)
 
     def save_to_file(self, filename=""):
         if not filename:
             filename = self.save_path
-        with open(filename, 'wb') as file:
-            pickle.dump(self.serialize(), file)
+        self.autosaver.wait()
+        data = self.serialize()
+        write_atomic(filename, data)
+        self.index_save(filename, data)
+        self._clear_journal(filename)
+        self.unsaved_changes = False
+
+    def _clear_journal(self, filename):
+        """
+        A full checkpoint holds every move, so the journal next to it goes whether or not this session
+        journals. One left by an earlier session would otherwise be replayed over the newer checkpoint.
+        """
+        if self.journal is not None and filename == self.save_path:
+            self.journal.clear()
+        else:
+            MoveJournal(filename).clear()
+
+    def autosave(self):
+        """
+        Call once per frame, hands a snapshot to the autosaver when there are changes and a save is due.
+        In journal mode the snapshot is the checkpoint the journal gets compacted into.
+        """
+        if not self.unsaved_changes or self.autosaver.is_busy():
+            return
+        compact = self.journal is not None and self.journal.records >= self.journal_compact_after
+        if not (compact or self.autosaver.is_due()):
+            return
+        snapshot = self.serialize()
+        save_path, journal = self.save_path, self.journal
+        if journal is not None:
+            journal.roll()
+
+        def on_saved():
+            self.index_save(save_path, snapshot)
+            if journal is not None:
+                journal.drop_rolled()
+            else:
+                MoveJournal(save_path).clear()
+
+        if self.autosaver.save(snapshot, save_path, on_saved):
+            self.unsaved_changes = False
+
+    def enable_journal(self, compact_after=1000, checkpoint_interval_s=300.0):
+        """
+        Every drop, connect and rotate gets appended to a journal next to save_path,
+        which is compacted into a full save after compact_after records or checkpoint_interval_s.
+        """
+        self.journal = MoveJournal(self.save_path)
+        self.journal_compact_after = compact_after
+        self.autosaver.interval_s = checkpoint_interval_s
+        self.save_to_file()
+
+    def _journal(self, op, piece, other=(0, 0), x=0, y=0):
+        if self.journal is not None and not self._replaying:
+            self.journal.append(op, self.find_position(piece), other, x, y, self.stopwatch.elapsed_time)
+
+    def replay_journal(self, save_path=""):
+        """applies the journal left next to a save on top of the loaded checkpoint"""
+        journal = MoveJournal(save_path or self.save_path)
+        self._replaying = True
+        try:
+            for op, position, other, x, y, elapsed in journal.read():
+                piece = self.pieces.get(position)
+                if piece is None:
+                    continue
+                if op == MoveJournal.DROP:
+                    self._move_group_to(piece, (x, y))
+                elif op == MoveJournal.ROTATE and self.rotatable:
+                    for _ in range(3):
+                        if piece.direction == x % 4:
+                            break
+                        self._rotate_group(piece, True)
+                elif op == MoveJournal.CONNECT and other in self.pieces:
+                    self.connect_pieces(piece, self.pieces[other], (x, y))
+                self.stopwatch.elapsed_time = max(self.stopwatch.elapsed_time, elapsed)
+        finally:
+            self._replaying = False
+        self.request_full_redraw()
+
+    def _move_group_to(self, piece, topleft):
+        self._sync_group(piece)
+        rel = (topleft[0] - piece.piece.x, topleft[1] - piece.piece.y)
+        root = self._groups.find(piece)
+        group = self._groups.members(root)
+        sprite = self._sprites.get(root)
+        if sprite is not None:
+            sprite.move(rel)
+            self._sync_sprite(root, sprite)
+        else:
+            for grp_piece in group:
+                grp_piece.move(rel)
+            if root in self._bounds:
+                self._bounds[root].move_ip(rel)
+        self._update_spatial(group)
 
     @abstractmethod
     def create_pieces(self, surface, rowcols, piece_dim):
@@ -219,12 +680,80 @@ class Puzzle(ABC):
 
     @staticmethod
     def clearsave(filename):
-        open(filename, 'w').close()
+        if os.path.exists(filename):
+            os.remove(filename)
+        try:
+            SaveCatalog.for_save(filename).remove(filename)
+        except sqlite3.Error:
+            pass  # a stale entry is dropped by the next collect_garbage
+
+    @staticmethod
+    def index_save(filename, data):
+        """records a written save in the catalog of its directory, the save itself is fine if this fails"""
+        try:
+            SaveCatalog.for_save(filename).record(filename, data)
+        except (sqlite3.Error, OSError):
+            pass
 
     @abstractmethod
     def serialize(self):
         pass
 
+    def _serialize_state(self):
+        """
+        Everything but the piece type, piece images are not stored but cut from image_path again on load.
+        """
+        self.sync_pieces()
+        return {
+            'version': self.SAVE_VERSION,
+            'size_x': self.image.get_width(),
+            'size_y': self.image.get_height(),
+            'amount': self.get_amount(),
+            'rowcols': self.rowcols,
+            'seed': self.seed,
+            'pieces': {key: piece.serialize() for key, piece in self.pieces.items()},
+            'connected_groups': [[self.find_position(p) for p in group] for group in self.connected_groups],
+            'active': self.find_position(self.active) if self.active else None,
+            'rotatable': self.rotatable,
+            'image_path': self.image_path,
+            'image_hash': self.get_image_hash(),
+            'stopwatch_time': self.stopwatch.elapsed_time,
+            'save_path': self.save_path
+        }
+
+    def _restore_state(self, data, piece_cls):
+        # saves of version 1 also carry the pixels of every piece, which have nothing around the cell for
+        # the knobs, so their pieces are cut from the image like newer ones, only without a hash to check
+        if data.get('version', 1) > 1 and data['image_hash'] != self.get_image_hash():
+            raise ValueError(f"{self.image_path} changed since the puzzle was saved")
+        piece_width, piece_height = self.get_piece_dims()
+        self.pieces = {(row, col): piece_cls.deserialize(piece_data,
+                                                         self.get_piece_image(row, col, piece_width, piece_height))
+                       for (row, col), piece_data in data['pieces'].items()}
+        self._restore_groups(data['connected_groups'])
+        self.active = self.pieces[data['active']] if data['active'] else None
+        self.stopwatch.elapsed_time = int(data['stopwatch_time'])
+        self.save_path = data['save_path']
+
+    def _restore_groups(self, position_groups):
+        """
+        Joins the saved groups straight in the index, their pieces already lie where they belong to each other.
+        The open edges of every group are collected in one pass over its positions.
+        """
+        for positions in position_groups:
+            positions = {tuple(position) for position in positions}
+            first = self.pieces[next(iter(positions))]
+            for position in positions:
+                self._groups.union(first, self.pieces[position])
+            root = self._groups.find(first)
+            for position in positions:
+                if self.pieces[position] is not root:
+                    self._draw_order.pop(self.pieces[position], None)
+            self._open_edges[root] = {((row, col), neighbour) for row, col in positions
+                                      for neighbour in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                                      if neighbour in self.pieces and neighbour not in positions}
+        self.request_full_redraw()
+
     @staticmethod
     @abstractmethod
     def deserialize(data, surface):
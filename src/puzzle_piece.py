@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from src.rotation_cache import rotated
 
 
 class Piece(ABC):
@@ -8,7 +9,14 @@ class Piece(ABC):
         self.piece = None
         self.clicked = False
         self.direction = direction
-        self.image = image
+        self.base_image = image
+
+    @property
+    def image(self):
+        """the base image turned to the piece's direction"""
+        if self.base_image is None:
+            return None
+        return rotated(self.base_image, self.direction)
 
     @abstractmethod
     def get_width(self):
@@ -19,9 +27,13 @@ class Piece(ABC):
         pass
 
     @abstractmethod
-    def draw(self, surface):
+    def draw(self, surface, origin=(0, 0)):
         pass
 
+    def get_draw_rect(self):
+        """the area the piece covers when drawn, which can reach past its rect"""
+        return self.piece
+
     def move(self, rel):
         self.piece.move_ip(rel)
 
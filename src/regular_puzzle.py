@@ -1,10 +1,11 @@
 import pickle
-import random
+from src import jigsaw_mask
 from src.puzzle import Puzzle
 from src.regular_puzzle_piece import RegularPiece
 
 
 class RegularPuzzle(Puzzle):
+    PIECE_CLASS = RegularPiece
 
     def create_pieces(self, surface, rowcols, piece_dim):
         piece_width, piece_height = piece_dim
@@ -14,12 +15,12 @@ class RegularPuzzle(Puzzle):
         for row in range(rows):
             for col in range(cols):
                 rotation = 0
-                x = random.randint(0, int(screen_width - piece_width))
-                y = random.randint(0, int(screen_height - piece_height))
+                x = self.rng.randint(0, int(screen_width - piece_width))
+                y = self.rng.randint(0, int(screen_height - piece_height))
                 piece_image = self.get_piece_image(row, col, piece_width, piece_height)
                 if self.rotatable:
-                    rotation = random.randint(0, 3)
-                self.pieces[(row, col)] = RegularPiece(x, y, piece_width, piece_height, piece_image, rotation)
+                    rotation = self.rng.randint(0, 3)
+                self.add_piece((row, col), RegularPiece(x, y, piece_width, piece_height, piece_image, rotation))
         self.assign_tabs()
 
     def assign_tabs(self):
@@ -42,9 +43,9 @@ class RegularPuzzle(Puzzle):
                 top_neighbor = self.pieces[(x, y - 1)]
                 tabs['top'] = 7 - top_neighbor.tabs['bottom']
             if tabs['right'] is None:
-                tabs['right'] = random.randint(1, 6)
+                tabs['right'] = self.rng.randint(1, 6)
             if tabs['bottom'] is None:
-                tabs['bottom'] = random.randint(1, 6)
+                tabs['bottom'] = self.rng.randint(1, 6)
 
             if (x + 1, y) in self.pieces:
                 right_neighbor = self.pieces[(x + 1, y)]
@@ -53,22 +54,23 @@ class RegularPuzzle(Puzzle):
                 bottom_neighbor = self.pieces[(x, y + 1)]
                 bottom_neighbor.tabs['top'] = 7 - tabs['bottom']
             piece.add_tabs(tabs)
+        self.prepare_shapes()
+
+    def prepare_shapes(self):
+        """
+        builds the masks of every distinct tab combination at once, pieces cut their shapes lazily.
+        The masks of earlier puzzles go first, every piece size would otherwise add its masks for the whole session.
+        """
+        jigsaw_mask.clear()
+        signatures = {}
+        for piece in self.pieces.values():
+            if piece.base_image is not None and piece.tabs:
+                signatures.setdefault(piece.base_image.get_size(), []).append(piece.tab_signature())
+        for size, size_signatures in signatures.items():
+            jigsaw_mask.prepare(size_signatures, size)
 
     def serialize(self):
-        return {
-            'type': 'regular',
-            'size_x': self.image.get_width(),
-            'size_y': self.image.get_height(),
-            'amount': self.get_amount(),
-            'rowcols': self.rowcols,
-            'pieces': {key: piece.serialize() for key, piece in self.pieces.items()},
-            'connected_groups': [[self.find_position(p) for p in group] for group in self.connected_groups],
-            'active': self.find_position(self.active) if self.active else None,
-            'rotatable': self.rotatable,
-            'image_path': self.image_path,
-            'stopwatch_time': self.stopwatch.elapsed_time,
-            'save_path': self.save_path
-        }
+        return {'type': 'regular', **self._serialize_state()}
 
     @staticmethod
     def load(filename, surface):
@@ -77,19 +79,16 @@ class RegularPuzzle(Puzzle):
                 obj = pickle.load(file)
                 puzzle_found = RegularPuzzle.deserialize(obj, surface)
                 if isinstance(puzzle_found, Puzzle):
+                    puzzle_found.replay_journal(filename)
                     return puzzle_found
                 else:
                     return None
-        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, KeyError, FileNotFoundError):
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, KeyError, ValueError,
+                OSError):
             return None
 
     @staticmethod
     def deserialize(data, surface):
-        puzzle = RegularPuzzle(surface, data['size_x'], data['size_y'], data['amount'], data['image_path'], data['rotatable'])
-        puzzle.rowcols = data['rowcols']
-        puzzle.pieces = {key: RegularPiece.deserialize(piece_data) for key, piece_data in data['pieces'].items()}
-        puzzle.connected_groups = [{puzzle.pieces[pos] for pos in group} for group in data['connected_groups']]
-        puzzle.active = puzzle.pieces[data['active']] if data['active'] else None
-        puzzle.stopwatch.elapsed_time = int(data['stopwatch_time'])
-        puzzle.save_path = data['save_path']
+        puzzle = RegularPuzzle.from_saved(data, surface)
+        puzzle.prepare_shapes()
         return puzzle
@@ -1,5 +1,7 @@
 import pygame
+from src import jigsaw_mask
 from src.puzzle_piece import Piece
+from src.rotation_cache import rotated
 
 
 class RegularPiece(Piece):
@@ -10,21 +12,60 @@ class RegularPiece(Piece):
         self.topleft = self.piece.topleft
         self.rotate_dir(rotation)
         self.tabs = {}
+        self._shaped = None
 
     def get_width(self):
         return self.piece.width
 
     def add_tabs(self, tabs):
         self.tabs = tabs
+        self._shaped = None
+
+    def tab_signature(self):
+        """
+        tab codes of the visible top, right, bottom and left edge of the unrotated piece,
+        tabs are keyed by grid position so 'left' is the edge towards the previous row
+        """
+        if not self.tabs:
+            return None
+        return self.tabs['left'], self.tabs['bottom'], self.tabs['right'], self.tabs['top']
+
+    @property
+    def image(self):
+        if self.base_image is None:
+            return None
+        if self._shaped is None:
+            signature = self.tab_signature()
+            self._shaped = jigsaw_mask.cut(self.base_image, signature) if signature else self.base_image
+        return rotated(self._shaped, self.direction)
+
+    def get_margin(self):
+        if self.base_image is None or not self.tabs:
+            return 0
+        return jigsaw_mask.tab_margin(self.base_image.get_size())
+
+    def get_draw_rect(self):
+        margin = self.get_margin()
+        return self.piece.inflate(2 * margin, 2 * margin)
+
+    def click(self, pos):
+        """only the opaque pixels of the shape count, not the corners around its tabs"""
+        rect = self.get_draw_rect()
+        if not rect.collidepoint(pos):
+            return False
+        if self.base_image is None or not self.tabs:
+            return True
+        mask = jigsaw_mask.hit_mask(self.tab_signature(), self.base_image.get_size(), self.direction)
+        return bool(mask.get_at((pos[0] - rect.x, pos[1] - rect.y)))
 
     def get_height(self):
         return self.piece.height
 
-    def draw(self, surface):
+    def draw(self, surface, origin=(0, 0)):
         if self.image:
-            surface.blit(self.image, self.piece)
+            surface.blit(self.image, self.get_draw_rect().move(-origin[0], -origin[1]))
         else:
-            pygame.draw.rect(surface, (255, 255, 255), self.piece)
+            pygame.draw.rect(surface, (255, 255, 255), self.piece.move(-origin[0], -origin[1]))
 
     def relocate_inside_surface(self, surface):
         hor_move = 0
@@ -83,34 +124,33 @@ class RegularPiece(Piece):
 
     def rotate(self, clockwise):
         super().rotate(clockwise)
-        angle = 90 if clockwise else -90
-        self.image = pygame.transform.rotate(self.image, angle)
         old_center = self.piece.center
-        self.piece = self.image.get_rect(center=old_center)
+        self.piece = pygame.Rect(0, 0, self.piece.height, self.piece.width)
+        self.piece.center = old_center
 
     def rotate_dir(self, direction):
         self.direction = direction
-        angle = direction * 90
-        self.image = pygame.transform.rotate(self.image, angle)
         old_center = self.piece.center
-        self.piece = self.image.get_rect(center=old_center)
+        if self.base_image:
+            self.piece = self.base_image.get_rect()
+        if direction % 2:
+            self.piece = pygame.Rect(0, 0, self.piece.height, self.piece.width)
+        self.piece.center = old_center
 
     def serialize(self):
-        original_image = pygame.transform.rotate(self.image, 90 * (4 - self.direction))
         return {
             'x': self.piece.x,
             'y': self.piece.y,
             'width': self.piece.width,
             'height': self.piece.height,
-            'image': pygame.image.tostring(original_image, "ARGB"),
             'rotation': self.direction,
-            'tabs': self.tabs
+            'tabs': dict(self.tabs)
         }
 
     @staticmethod
-    def deserialize(data):
-        image = pygame.image.fromstring(data['image'], (data['width'], data['height']), "ARGB")
-        piece_image = pygame.transform.scale(image, (data['width'], data['height']))
-        piece = RegularPiece(data['x'], data['y'], data['width'], data['height'], piece_image, data['rotation'])
+    def deserialize(data, image=None):
+        width, height = image.get_size() if image else (data['width'], data['height'])
+        piece = RegularPiece(data['x'], data['y'], width, height, image, data['rotation'])
+        piece.piece.topleft = piece.topleft = (data['x'], data['y'])
         piece.add_tabs(data['tabs'])
         return piece
@@ -0,0 +1,93 @@
+"""
+Replays a recording made with main.py --record headless and as fast as possible:
+    python replay.py recordings/20240101-120000.rec
+Prints how long the replay took and a digest of the final puzzle, which stays the same between
+runs and between versions of the game that do not change what a move does.
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from src import audio_handler, custom_timer  # noqa: E402
+from event_recorder import read_recording  # noqa: E402
+from game_state import Play  # noqa: E402
+from regular_puzzle import RegularPuzzle  # noqa: E402
+from src.square_puzzle import SquarePuzzle  # noqa: E402
+
+PUZZLE_TYPES = {'regular': RegularPuzzle, 'square': SquarePuzzle}
+
+
+def replay(filename, save_dir, every_frame=False):
+    """
+    Drives a Play state with the events of a recording on an offscreen surface, returns the state and
+    the number of frames run. Frames without events only redraw, they are skipped unless every_frame.
+    The timers are reset and advanced to the recorded time of every frame before its events are handled,
+    the order in which Game.run_game does it. Saves go to save_dir instead of where the recorded game saved.
+    """
+    header, records = read_recording(filename)
+    save_name = os.path.basename(header['puzzle']['save_path']) or "replay.pkl"
+    data = dict(header['puzzle'], save_path=os.path.join(save_dir, save_name))
+    surface = pygame.Surface(header['surface_size'])
+    puzzle = PUZZLE_TYPES[data['type']].deserialize(data, surface)
+    custom_timer.timers.reset()
+    play = Play.from_existing_puzzle(surface, Play.THEMES['darkblue'], puzzle)
+    frames = 0
+    last_frame = records[-1][0] if records else -1
+    records_by_frame = iter(records)
+    record = next(records_by_frame, None)
+    for frame in range(last_frame + 1):
+        if record is not None and record[0] == frame:
+            custom_timer.timers.tick(record[1] - custom_timer.timers.now_ms)
+            events = record[2]
+            record = next(records_by_frame, None)
+        elif every_frame:
+            events = []
+        else:
+            continue
+        for event in events:
+            if event.type == pygame.VIDEORESIZE:
+                play.surface = pygame.Surface(event.size)
+        play.handle_events(events)
+        frames += 1
+        if play.draw() is not None or play.quit:
+            break  # the puzzle was completed or the game closed
+    return play, frames
+
+
+def digest(puzzle):
+    """hash of the position and direction of every piece and of the groups they form"""
+    puzzle.sync_pieces()
+    state = sorted((position, piece.piece.topleft, piece.direction) for position, piece in puzzle.pieces.items())
+    groups = sorted(sorted(puzzle.find_position(piece) for piece in group) for group in puzzle.connected_groups)
+    return hashlib.sha1(repr((state, groups)).encode()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording")
+    parser.add_argument("--every-frame", action="store_true", help="also redraw the frames without input")
+    parser.add_argument("--dirty-rects", action="store_true", help="draw like main.py --dirty-rects")
+    args = parser.parse_args()
+
+    pygame.init()
+    Play.dirty_rendering = args.dirty_rects
+    audio_handler.init(audio_handler.NullBackend())  # a replay runs silent
+    with tempfile.TemporaryDirectory() as save_dir:
+        start = time.perf_counter()
+        play, frames = replay(args.recording, save_dir, args.every_frame)
+        elapsed = time.perf_counter() - start
+        play.puzzle.autosaver.wait()
+    print(f"{frames} frames in {elapsed:.2f} s, {len(play.puzzle.connected_groups)} groups, "
+          f"complete: {play.puzzle.is_complete()}")
+    print("digest", digest(play.puzzle))
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+import pygame
+
+MAX_ROTATED_BYTES = 64 * 1024 * 1024
+
+_rotated = OrderedDict()
+_used_bytes = 0
+
+
+def rotated(image, direction):
+    """
+    image turned by direction quarter turns counterclockwise. Variants are made on first use and kept in an
+    LRU bounded by MAX_ROTATED_BYTES, so a big puzzle does not hold three extra copies of every piece up front.
+    """
+    global _used_bytes
+    direction %= 4
+    if direction == 0:
+        return image
+    key = (image, direction)
+    surface = _rotated.get(key)
+    if surface is None:
+        surface = pygame.transform.rotate(image, direction * 90)
+        _rotated[key] = surface
+        _used_bytes += _size_of(surface)
+        while _used_bytes > MAX_ROTATED_BYTES and len(_rotated) > 1:
+            _, evicted = _rotated.popitem(last=False)
+            _used_bytes -= _size_of(evicted)
+    else:
+        _rotated.move_to_end(key)
+    return surface
+
+
+def _size_of(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def used_bytes():
+    return _used_bytes
+
+
+def clear():
+    global _used_bytes
+    _rotated.clear()
+    _used_bytes = 0
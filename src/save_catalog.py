@@ -0,0 +1,107 @@
+import os
+import pickle
+import sqlite3
+from contextlib import closing
+
+CATALOG_NAME = "catalog.sqlite3"
+
+
+def progress_of(data):
+    """fraction of the connections made in a serialized puzzle, 1.0 when it forms a single group"""
+    amount = data['amount']
+    if amount <= 1:
+        return 1.0
+    joined = sum(len(group) - 1 for group in data['connected_groups'])
+    return joined / (amount - 1)
+
+
+class SaveCatalog:
+    """
+    Index of the saves in a directory, stored in a SQLite file next to them, so the selection screen
+    can ask whether a puzzle has a save and how far along it is without unpickling anything.
+    Every call opens its own connection, which keeps it usable from the autosave thread.
+    """
+
+    def __init__(self, directory="saves"):
+        self.directory = directory
+        self.path = os.path.join(directory, CATALOG_NAME)
+
+    @classmethod
+    def for_save(cls, filename):
+        return cls(os.path.dirname(filename) or ".")
+
+    def _connect(self):
+        os.makedirs(self.directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("""CREATE TABLE IF NOT EXISTS saves (
+                                  path TEXT PRIMARY KEY,
+                                  image_path TEXT NOT NULL,
+                                  puzzle_type TEXT NOT NULL,
+                                  amount INTEGER NOT NULL,
+                                  progress REAL NOT NULL,
+                                  elapsed REAL NOT NULL,
+                                  file_size INTEGER NOT NULL,
+                                  mtime_ns INTEGER NOT NULL)""")
+        connection.execute("CREATE INDEX IF NOT EXISTS saves_by_puzzle ON saves (image_path, puzzle_type, amount)")
+        return connection
+
+    def record(self, filename, data):
+        """indexes the save just written to filename from the data that was pickled into it"""
+        stat = os.stat(filename)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("INSERT OR REPLACE INTO saves VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (os.path.normpath(filename), data['image_path'], data['type'], data['amount'],
+                                progress_of(data), data['stopwatch_time'], stat.st_size, stat.st_mtime_ns))
+
+    def find(self, image_path, puzzle_type, amount):
+        """returns the entries of the saves of a puzzle as dicts, most recently saved first"""
+        with closing(self._connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute("SELECT * FROM saves WHERE image_path = ? AND puzzle_type = ? AND amount = ? "
+                                      "ORDER BY mtime_ns DESC", (image_path, puzzle_type, amount)).fetchall()
+        return [dict(row) for row in rows]
+
+    def remove(self, filename):
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM saves WHERE path = ?", (os.path.normpath(filename),))
+
+    def collect_garbage(self):
+        """
+        Drops entries whose save is gone or was changed behind the catalog's back, deletes the empty files
+        older versions left behind and indexes saves the catalog does not know yet.
+        """
+        with closing(self._connect()) as connection, connection:
+            known = self._drop_stale_rows(connection)
+        self._index_new_files(known)
+
+    @staticmethod
+    def _drop_stale_rows(connection):
+        """deletes the rows of saves that are gone or changed, returns the paths of the rows still current"""
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in
+                 connection.execute("SELECT path, file_size, mtime_ns FROM saves")}
+        current = set()
+        for path, (size, mtime_ns) in known.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is None or (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                connection.execute("DELETE FROM saves WHERE path = ?", (path,))
+            else:
+                current.add(path)
+        return current
+
+    def _index_new_files(self, known):
+        """indexes the saves in the directory that are not in known, deletes the empty ones older versions left"""
+        for name in os.listdir(self.directory):
+            path = os.path.normpath(os.path.join(self.directory, name))
+            if not name.endswith(".pkl") or path in known:
+                continue
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+                continue
+            try:
+                with open(path, 'rb') as file:
+                    self.record(path, pickle.load(file))
+            except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, TypeError, OSError):
+                pass  # not a save this catalog can describe, it is left alone
@@ -0,0 +1,43 @@
+class SpatialHash:
+    """
+    Uniform grid over rects: every item is stored in each cell its rect overlaps,
+    so a point query only looks at the items in the cell under it.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = max(1, int(cell_size))
+        self._cells = {}
+        self._item_cells = {}
+
+    def _cell_range(self, rect):
+        left, top = rect.left // self.cell_size, rect.top // self.cell_size
+        right, bottom = (rect.right - 1) // self.cell_size, (rect.bottom - 1) // self.cell_size
+        return tuple((cx, cy) for cx in range(left, right + 1) for cy in range(top, bottom + 1))
+
+    def insert(self, item, rect):
+        cells = self._cell_range(rect)
+        old_cells = self._item_cells.get(item)
+        if old_cells == cells:
+            return
+        if old_cells:
+            self._discard(item, old_cells)
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(item)
+        self._item_cells[item] = cells
+
+    update = insert
+
+    def _discard(self, item, cells):
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(item)
+                if not bucket:
+                    del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._item_cells.clear()
+
+    def query_point(self, pos):
+        return self._cells.get((int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size), set())
@@ -16,11 +16,12 @@ class SquarePiece(Piece):
     def get_height(self):
         return self.piece.height
 
-    def draw(self, surface):
+    def draw(self, surface, origin=(0, 0)):
+        rect = self.piece.move(-origin[0], -origin[1])
         if self.image:
-            surface.blit(self.image, self.piece)
+            surface.blit(self.image, rect)
         else:
-            pygame.draw.rect(surface, (255, 255, 255), self.piece)
+            pygame.draw.rect(surface, (255, 255, 255), rect)
 
     def relocate_inside_surface(self, surface):
         hor_move = 0
@@ -79,32 +80,31 @@ class SquarePiece(Piece):
 
     def rotate(self, clockwise):
         super().rotate(clockwise)
-        angle = 90 if clockwise else -90
-        self.image = pygame.transform.rotate(self.image, angle)
         old_center = self.piece.center
-        self.piece = self.image.get_rect(center=old_center)
+        self.piece = pygame.Rect(0, 0, self.piece.height, self.piece.width)
+        self.piece.center = old_center
 
     def rotate_dir(self, direction):
         self.direction = direction
-        angle = direction * 90
-        self.image = pygame.transform.rotate(self.image, angle)
         old_center = self.piece.center
-        self.piece = self.image.get_rect(center=old_center)
+        if self.base_image:
+            self.piece = self.base_image.get_rect()
+        if direction % 2:
+            self.piece = pygame.Rect(0, 0, self.piece.height, self.piece.width)
+        self.piece.center = old_center
 
     def serialize(self):
-        original_image = pygame.transform.rotate(self.image, 90 * (4 - self.direction))
         return {
             'x': self.piece.x,
             'y': self.piece.y,
             'width': self.piece.width,
             'height': self.piece.height,
-            'image': pygame.image.tostring(original_image, "ARGB"),
             'rotation': self.direction
         }
 
     @staticmethod
-    def deserialize(data):
-        image = pygame.image.fromstring(data['image'], (data['width'], data['height']), "ARGB")
-        piece_image = pygame.transform.scale(image, (data['width'], data['height']))
-        piece = SquarePiece(data['x'], data['y'], data['width'], data['height'], piece_image, data['rotation'])
+    def deserialize(data, image=None):
+        width, height = image.get_size() if image else (data['width'], data['height'])
+        piece = SquarePiece(data['x'], data['y'], width, height, image, data['rotation'])
+        piece.piece.topleft = piece.topleft = (data['x'], data['y'])
         return piece
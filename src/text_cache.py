@@ -0,0 +1,37 @@
+from collections import OrderedDict
+
+import pygame
+
+MAX_RENDERED_TEXTS = 256
+
+_fonts = {}
+_rendered = OrderedDict()
+
+
+def get_font(name, size):
+    """shared font objects, name None gives pygame's default font, any other name is looked up as a system font"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(None, size) if name is None else pygame.font.SysFont(name, size)
+        _fonts[key] = font
+    return font
+
+
+def render_text(font, text, colour, antialias=True):
+    """renders text through a bounded LRU cache keyed by (font, text, colour)"""
+    key = (font, text, tuple(colour), antialias)
+    surface = _rendered.get(key)
+    if surface is None:
+        surface = font.render(text, antialias, colour)
+        _rendered[key] = surface
+        if len(_rendered) > MAX_RENDERED_TEXTS:
+            _rendered.popitem(last=False)
+    else:
+        _rendered.move_to_end(key)
+    return surface
+
+
+def clear():
+    _fonts.clear()
+    _rendered.clear()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from src import audio_handler
+
+
+class RecordingBackend(audio_handler.NullBackend):
+    def __init__(self):
+        super().__init__()
+        self.loaded = []
+        self.played = []
+
+    def load(self, path):
+        self.loaded.append(path)
+
+    def play(self, path):
+        super().play(path)
+        self.played.append(path)
+
+
+class AudioServiceTestCase(unittest.TestCase):
+    def test_identical_sounds_are_coalesced(self):
+        now = [0]
+        backend = RecordingBackend()
+        service = audio_handler.AudioService(backend, coalesce_ms=50, clock=lambda: now[0])
+        self.assertTrue(service.play("click.mp3"))
+        self.assertFalse(service.play("click.mp3"))
+        self.assertTrue(service.play("button1.wav"))
+        now[0] = 49
+        self.assertFalse(service.play("click.mp3"))
+        now[0] = 50
+        self.assertTrue(service.play("click.mp3"))
+        self.assertEqual(backend.played, ["click.mp3", "button1.wav", "click.mp3"])
+        self.assertEqual(backend.plays, 3)
+
+    def test_preload_decodes_every_match_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["button2.wav", "button1.wav", "click.mp3"]:
+                open(os.path.join(tmp, name), 'wb').close()
+            backend = RecordingBackend()
+            audio_handler.AudioService(backend).preload([os.path.join(tmp, "button*.wav")])
+        self.assertEqual([os.path.basename(path) for path in backend.loaded], ["button1.wav", "button2.wav"])
+
+    def test_play_sound_goes_through_the_service(self):
+        backend = audio_handler.NullBackend()
+        audio_handler.init(backend)
+        self.addCleanup(audio_handler.init, audio_handler.NullBackend())
+        audio_handler.play_sound("resources/piece_click.mp3")
+        audio_handler.play_sound("resources/piece_click.mp3")
+        self.assertEqual(backend.plays, 1)
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
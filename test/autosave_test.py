@@ -0,0 +1,29 @@
+import os
+import pickle
+import tempfile
+import unittest
+from src.autosave import Autosaver
+
+
+class AutosaverTestCase(unittest.TestCase):
+    def test_saves_when_due_one_at_a_time(self):
+        now = [0.0]
+        autosaver = Autosaver(10, clock=lambda: now[0])
+        self.assertFalse(autosaver.is_due())
+        now[0] = 10.0
+        self.assertTrue(autosaver.is_due())
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "save.pkl")
+            self.assertTrue(autosaver.save({'pieces': {(0, 0): (1, 2)}}, filename))
+            self.assertFalse(autosaver.is_due())
+            autosaver.wait()
+            with open(filename, 'rb') as file:
+                self.assertEqual(pickle.load(file), {'pieces': {(0, 0): (1, 2)}})
+            self.assertEqual(os.listdir(tmp), ["save.pkl"])
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,51 @@
+import unittest
+from src import custom_timer
+from src.custom_timer import Timer, TimerService
+
+
+class TimerServiceTestCase(unittest.TestCase):
+    def test_actions_run_when_due_in_order(self):
+        service = TimerService()
+        fired = []
+        service.call_later(30, lambda: fired.append("b"))
+        service.call_later(10, lambda: fired.append("a"))
+        service.call_later(30, lambda: fired.append("c"))
+        service.tick(9)
+        self.assertEqual(fired, [])
+        service.tick(1)
+        self.assertEqual(fired, ["a"])
+        service.tick(100)
+        self.assertEqual(fired, ["a", "b", "c"])
+        self.assertEqual(service.pending(), 0)
+
+    def test_cancelled_actions_do_not_run(self):
+        service = TimerService()
+        fired = []
+        service.call_later(10, lambda: fired.append("kept"))
+        service.call_later(5, lambda: fired.append("cancelled")).cancel()
+        self.assertEqual(service.pending(), 1)
+        service.tick(10)
+        self.assertEqual(fired, ["kept"])
+
+    def test_timer_runs_on_the_frame_clock(self):
+        custom_timer.timers.reset()
+        self.addCleanup(custom_timer.timers.reset)
+        timer = Timer(200)
+        timer.start()
+        custom_timer.timers.tick(199)
+        self.assertFalse(timer.is_time_up())
+        custom_timer.timers.tick(1)
+        self.assertTrue(timer.is_time_up())
+        timer.stop()
+        self.assertFalse(timer.is_time_up())
+        timer.start()
+        timer.stop()
+        custom_timer.timers.tick(500)
+        self.assertFalse(timer.is_time_up())
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,27 @@
+import unittest
+from src.disjoint_set import DisjointSet
+
+
+class DisjointSetTestCase(unittest.TestCase):
+    def test_union_keeps_members(self):
+        groups = DisjointSet(range(6))
+        groups.union(0, 1)
+        groups.union(2, 3)
+        root, absorbed = groups.union(1, 3)
+        self.assertIsNotNone(absorbed)
+        self.assertEqual(groups.members(0), {0, 1, 2, 3})
+        self.assertIs(groups.find(2), root)
+        self.assertEqual(groups.union(0, 2), (root, None))
+        self.assertEqual(groups.groups(), [{0, 1, 2, 3}])
+
+    def test_unknown_item_is_singleton(self):
+        groups = DisjointSet()
+        self.assertEqual(groups.size("a"), 1)
+        self.assertEqual(groups.members("a"), {"a"})
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
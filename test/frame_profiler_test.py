@@ -0,0 +1,75 @@
+import json
+import tempfile
+import unittest
+import pygame
+from src import frame_profiler
+
+
+class FrameProfilerTestCase(unittest.TestCase):
+    def setUp(self):
+        frame_profiler.clear()
+
+    def tearDown(self):
+        frame_profiler.set_enabled(False)
+        frame_profiler.clear()
+
+    def test_disabled_records_nothing(self):
+        frame_profiler.set_enabled(False)
+        frame_profiler.begin_frame()
+        with frame_profiler.section("draw"):
+            pass
+        frame_profiler.end_frame()
+        self.assertIs(frame_profiler.section("draw"), frame_profiler.section("update"))
+        self.assertEqual(frame_profiler.frame_times_ms(), [])
+        self.assertEqual(frame_profiler.chrome_trace()['traceEvents'], [])
+
+    def test_sections_are_summed_per_frame_and_traced(self):
+        frame_profiler.set_enabled(True)
+        for _ in range(3):
+            frame_profiler.begin_frame()
+            with frame_profiler.section("draw"):
+                with frame_profiler.section("relocate"):
+                    pass
+                with frame_profiler.section("relocate"):
+                    pass
+            frame_profiler.end_frame()
+        self.assertEqual(len(frame_profiler.frame_times_ms()), 3)
+        self.assertEqual(len(frame_profiler.section_times_ms("relocate")), 3)
+        self.assertEqual(set(frame_profiler.summary()), {'frame', 'draw', 'relocate'})
+        events = frame_profiler.chrome_trace()['traceEvents']
+        self.assertEqual([event['name'] for event in events[:4]], ['frame', 'relocate', 'relocate', 'draw'])
+        frame, draw = events[0], events[3]
+        self.assertTrue(frame['ts'] <= draw['ts'] and draw['ts'] + draw['dur'] <= frame['ts'] + frame['dur'])
+
+    def test_statistics(self):
+        values = list(range(1, 101))
+        self.assertEqual(frame_profiler.percentile(values, 0.5), 51)
+        self.assertEqual(frame_profiler.percentile(values, 0.99), 100)
+        counts = frame_profiler.histogram([0.5, 1, 3, 16, 17, 500])
+        self.assertEqual(counts, [2, 0, 1, 0, 0, 1, 1, 0, 0, 1])
+
+    def test_overlay_covers_a_fixed_rect(self):
+        pygame.font.init()
+        surface = pygame.Surface((800, 600))
+        rect = frame_profiler.draw_overlay(surface)
+        self.assertEqual(rect.size, frame_profiler.OVERLAY_SIZE)
+        self.assertTrue(surface.get_rect().contains(rect))
+
+    def test_dumped_trace_is_named_on_the_overlay(self):
+        pygame.font.init()
+        surface, without = pygame.Surface((800, 600)), pygame.Surface((800, 600))
+        frame_profiler.draw_overlay(without)
+        with tempfile.TemporaryDirectory() as directory:
+            path = frame_profiler.dump_trace(directory)
+            with open(path) as file:
+                self.assertEqual(json.load(file)['traceEvents'], [])
+        rect = frame_profiler.draw_overlay(surface)
+        self.assertNotEqual(pygame.image.tostring(surface.subsurface(rect), "RGB"),
+                            pygame.image.tostring(without.subsurface(rect), "RGB"))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.preview_loader import PreviewLoader
+
+
+class PreviewLoaderTestCase(unittest.TestCase):
+    def wait_for(self, loader, path, bounds):
+        for _ in range(500):
+            image = loader.get(path, bounds)
+            if image is not None or loader.failed(path, bounds):
+                return image
+            time.sleep(0.01)
+        self.fail("preview did not load")
+
+    def test_preview_is_scaled_and_cached_on_disk(self):
+        image_path = os.path.join(os.path.dirname(__file__), 'puzzle_test.jpg')
+        with tempfile.TemporaryDirectory() as cache_dir:
+            loader = PreviewLoader(cache_dir)
+            image = self.wait_for(loader, image_path, (200, 200))
+            self.assertLessEqual(max(image.get_size()), 200)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertIs(loader.get(image_path, (200, 200)), image)
+            from_disk = self.wait_for(PreviewLoader(cache_dir), image_path, (200, 200))
+            self.assertEqual(from_disk.get_size(), image.get_size())
+            loader.shutdown()
+
+    def test_missing_image_fails(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            loader = PreviewLoader(cache_dir)
+            self.assertIsNone(self.wait_for(loader, os.path.join(cache_dir, 'missing.png'), (200, 200)))
+            self.assertTrue(loader.failed(os.path.join(cache_dir, 'missing.png'), (200, 200)))
+            loader.shutdown()
+
+    def test_unrequested_prefetches_are_bounded(self):
+        image_path = os.path.join(os.path.dirname(__file__), 'puzzle_test.jpg')
+        with tempfile.TemporaryDirectory() as cache_dir:
+            paths = [os.path.join(cache_dir, f"{index}.jpg") for index in range(6)]
+            for path in paths:
+                shutil.copyfile(image_path, path)
+            loader = PreviewLoader(os.path.join(cache_dir, "thumbnails"), max_cached=2)
+            loader.prefetch(paths[1:], (100, 100))
+            self.assertIsNotNone(self.wait_for(loader, paths[0], (100, 100)))
+            for _ in range(500):
+                if not loader._pending:
+                    break
+                time.sleep(0.01)
+                loader.get(paths[0], (100, 100))
+            self.assertEqual(loader._pending, {})
+            self.assertEqual(len(loader._cache), 2)
+            loader.shutdown()
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -1,6 +1,9 @@
 import os
+import tempfile
 import unittest
 import pygame
+from src import jigsaw_mask
+from src.group_sprite import GroupSprite
 from src.regular_puzzle import RegularPuzzle
 from src.regular_puzzle_piece import RegularPiece
 
@@ -25,6 +28,276 @@ class MyTestCase(unittest.TestCase):
         new_puzzle = RegularPuzzle.deserialize(data, screen)
         self.assertIsNotNone(new_puzzle)
 
+    def test_save_is_pixel_free(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, True)
+        data = puzzle.serialize()
+        self.assertNotIn('image', data['pieces'][(0, 0)])
+        new_puzzle = RegularPuzzle.deserialize(data, screen)
+        self.assertEqual(new_puzzle.seed, puzzle.seed)
+        for pos, piece in puzzle.pieces.items():
+            self.assertEqual(new_puzzle.pieces[pos].piece, piece.piece)
+            self.assertEqual(new_puzzle.pieces[pos].direction, piece.direction)
+            self.assertEqual(new_puzzle.pieces[pos].tabs, piece.tabs)
+
+    def test_save_puzzle_groups(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, False)
+        puzzle.connect_pieces(puzzle.pieces[(0, 0)], puzzle.pieces[(0, 1)], (0, 1))
+        puzzle.connect_pieces(puzzle.pieces[(1, 1)], puzzle.pieces[(0, 1)], (-1, 0))
+        new_puzzle = RegularPuzzle.deserialize(puzzle.serialize(), screen)
+        group = new_puzzle.find_group(new_puzzle.pieces[(1, 1)])
+        self.assertEqual(group, {new_puzzle.pieces[pos] for pos in [(0, 0), (0, 1), (1, 1)]})
+        self.assertIsNone(new_puzzle.find_group(new_puzzle.pieces[(1, 0)]))
+        self.assertFalse(new_puzzle.is_complete())
+        self.assertEqual(new_puzzle.find_position(new_puzzle.pieces[(1, 0)]), (1, 0))
+        self.assertIsNone(new_puzzle.find_position(puzzle.pieces[(1, 0)]))
+        self.assertEqual(new_puzzle.open_edges(new_puzzle.pieces[(0, 0)]), puzzle.open_edges(puzzle.pieces[(0, 0)]))
+
+    def test_load_v1_save_keeps_knobs(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, True)
+        data = puzzle.serialize()
+        # a version 1 save, every piece with its own unrotated pixels and no image hash
+        legacy = dict(data, version=1, pieces={})
+        del legacy['image_hash']
+        for pos, piece_data in data['pieces'].items():
+            image = puzzle.pieces[pos].base_image
+            legacy['pieces'][pos] = dict(piece_data, image=pygame.image.tostring(image, "ARGB"))
+        loaded = RegularPuzzle.deserialize(legacy, screen)
+        knob_pixels = 0
+        for pos, piece in puzzle.pieces.items():
+            image, expected = loaded.pieces[pos].image, piece.image
+            margin = loaded.pieces[pos].get_margin()
+            cell = image.get_rect().inflate(-2 * margin, -2 * margin)
+            for x in range(image.get_width()):
+                for y in range(image.get_height()):
+                    if not cell.collidepoint(x, y) and image.get_at((x, y)).a == 255:  # part of a knob
+                        knob_pixels += 1
+                        self.assertEqual(image.get_at((x, y)), expected.get_at((x, y)))
+            self.assertEqual(pygame.image.tostring(image, "RGBA"), pygame.image.tostring(expected, "RGBA"))
+        self.assertGreater(knob_pixels, 0)
+
+    def test_new_puzzle_drops_old_masks(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        RegularPuzzle(screen, 600, 300, 8, image_path, False)
+        puzzle = RegularPuzzle(screen, 600, 300, 32, image_path, False)
+        size = puzzle.pieces[(0, 0)].base_image.get_size()
+        self.assertEqual({key[1] for key in jigsaw_mask._alphas}, {size})
+
+    def test_click_picks_topmost_piece(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, False)
+        for piece in puzzle.pieces.values():
+            piece.move((-piece.piece.x, -piece.piece.y))
+        puzzle.pieces = dict(puzzle.pieces)
+        bottom, top = puzzle.pieces[(0, 0)], puzzle.pieces[(1, 3)]
+        puzzle.raise_group(bottom)
+        puzzle.raise_group(top)
+        self.assertIs(puzzle.piece_at((5, 5)), top)
+        puzzle.handle_click((5, 5))
+        self.assertIs(puzzle.active, top)
+
+    def test_dirty_draw_matches_full_draw(self):
+        pygame.font.init()
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        full = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, False)
+        puzzle.stopwatch.hide_show()
+        self.assertIsNone(puzzle.draw_dirty(screen, (0, 0, 0), (9, 9, 9)))
+        piece = puzzle.pieces[(1, 2)]
+        puzzle.handle_click(piece.piece.center)
+        puzzle.move((40, -25))
+        rects = puzzle.draw_dirty(screen, (0, 0, 0), (9, 9, 9))
+        self.assertTrue(any(rect.colliderect(piece.piece) for rect in rects))
+        full.fill((9, 9, 9))
+        puzzle.draw(full, (0, 0, 0))
+        self.assertEqual(pygame.image.tostring(screen, "RGB"), pygame.image.tostring(full, "RGB"))
+
+    def test_drag_group_sprite(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, False)
+        left, right = puzzle.pieces[(0, 0)], puzzle.pieces[(0, 1)]
+        puzzle.connect_pieces(left, right, (0, 1))
+        start = left.piece.topleft
+        bounds = puzzle.group_bounds(left)
+        puzzle.raise_group(left)
+        puzzle.handle_click(left.piece.center)
+        puzzle.handle_click_stop()
+        puzzle.move((30, 40))
+        self.assertEqual(puzzle.group_bounds(left), bounds.move(30, 40))
+        self.assertEqual(right.piece.topleft, (start[0] + 150, start[1]))
+        puzzle.handle_click((0, 0))
+        self.assertEqual(left.piece.topleft, (start[0] + 30, start[1] + 40))
+        self.assertEqual(right.piece.topleft, (start[0] + 180, start[1] + 40))
+
+    def test_journal_replay(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, True)
+        with tempfile.TemporaryDirectory() as tmp:
+            puzzle.save_path = os.path.join(tmp, "save.pkl")
+            puzzle.enable_journal()
+            piece = puzzle.pieces[(0, 0)]
+            puzzle.raise_group(piece)
+            puzzle.handle_click(piece.piece.center)
+            puzzle.handle_click_stop()
+            puzzle.move((7, 9))
+            puzzle.rotate(True)
+            puzzle.handle_click((0, 0))
+            puzzle.handle_click_stop()
+            puzzle.connect_pieces(puzzle.pieces[(1, 1)], puzzle.pieces[(0, 1)], (-1, 0))
+            self.assertEqual(puzzle.journal.records, 3)
+            loaded = RegularPuzzle.load(puzzle.save_path, screen)
+            for pos, original in puzzle.pieces.items():
+                self.assertEqual(loaded.pieces[pos].piece, original.piece)
+                self.assertEqual(loaded.pieces[pos].direction, original.direction)
+            self.assertEqual(loaded.find_group(loaded.pieces[(1, 1)]), {loaded.pieces[(1, 1)], loaded.pieces[(0, 1)]})
+            puzzle.save_to_file()
+            self.assertEqual(sorted(os.listdir(tmp)), ["catalog.sqlite3", "save.pkl"])
+
+    def test_checkpoint_drops_old_journal(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        screen = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(screen, 600, 300, 8, image_path, False)
+        with tempfile.TemporaryDirectory() as tmp:
+            puzzle.save_path = os.path.join(tmp, "save.pkl")
+            puzzle.enable_journal()
+            piece = puzzle.pieces[(0, 0)]
+            puzzle.raise_group(piece)
+            puzzle.handle_click(piece.piece.center)
+            puzzle.handle_click_stop()
+            puzzle.move((100, 100))
+            puzzle.handle_click((0, 0))
+            puzzle.handle_click_stop()
+            puzzle.journal.close()  # the journaling session ends with its journal on disk
+
+            for save in ('save_to_file', 'autosave'):
+                loaded = RegularPuzzle.load(puzzle.save_path, screen)
+                self.assertIsNone(loaded.journal)
+                piece = loaded.pieces[(0, 0)]
+                loaded.raise_group(piece)
+                loaded.handle_click(piece.piece.center)
+                loaded.handle_click_stop()
+                loaded.move((100, 100))
+                loaded.handle_click((0, 0))
+                loaded.handle_click_stop()
+                if save == 'autosave':
+                    loaded.autosaver.interval_s = 0
+                    loaded.autosave()
+                    loaded.autosaver.wait()
+                else:
+                    loaded.save_to_file()
+                self.assertFalse(os.path.exists(puzzle.save_path + ".journal"))
+                reloaded = RegularPuzzle.load(puzzle.save_path, screen)
+                self.assertEqual(reloaded.pieces[(0, 0)].piece, piece.piece)
+
+    def test_tabs_fit_neighbours(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        puzzle = RegularPuzzle(pygame.Surface((800, 600)), 600, 300, 8, image_path, False)
+        solved = pygame.Surface((600, 300), pygame.SRCALPHA)
+        width, height = puzzle.get_piece_dims()
+        for (row, col), piece in puzzle.pieces.items():
+            piece.piece.topleft = (int(col * width), int(row * height))
+            piece.draw(solved)
+        self.assertNotEqual(puzzle.pieces[(0, 0)].get_draw_rect(), puzzle.pieces[(0, 0)].piece)
+        alpha = pygame.surfarray.array_alpha(solved)
+        self.assertTrue((alpha == 255).all())
+
+    def test_click_follows_shape(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        puzzle = RegularPuzzle(pygame.Surface((800, 600)), 600, 300, 8, image_path, True)
+        for piece in puzzle.pieces.values():
+            rect = piece.get_draw_rect()
+            alpha = pygame.surfarray.array_alpha(piece.image)
+            for x in range(0, rect.width, 7):
+                for y in range(0, rect.height, 7):
+                    self.assertEqual(piece.click((rect.x + x, rect.y + y)), alpha[x, y] > 127)
+            self.assertFalse(piece.click(rect.topleft))
+        left, right = puzzle.pieces[(0, 0)], puzzle.pieces[(0, 1)]
+        for piece in puzzle.pieces.values():
+            piece.piece.topleft = (500, 400)
+        for piece in (left, right):
+            piece.rotate_dir(0)
+        left.piece.topleft = (50, 50)
+        right.piece.topleft = (left.piece.right, left.piece.top)
+        puzzle.pieces = puzzle.pieces
+        puzzle.raise_group(right)
+        code = left.tabs['bottom']
+        knob_y = left.piece.top + int(jigsaw_mask.TAB_POSITIONS[min(code, 7 - code)] * left.piece.height)
+        knob_owner = left if code <= 3 else right
+        self.assertIs(puzzle.piece_at((left.piece.right - 5, knob_y)), knob_owner)
+        self.assertIs(puzzle.piece_at((left.piece.right + 5, knob_y)), knob_owner)
+
+    def test_drop_snaps_open_edges(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        puzzle = RegularPuzzle(pygame.Surface((800, 600)), 600, 300, 8, image_path, False)
+        pieces = puzzle.pieces
+        puzzle.connect_pieces(pieces[(0, 1)], pieces[(0, 0)], (0, -1))
+        puzzle.connect_pieces(pieces[(1, 0)], pieces[(0, 0)], (-1, 0))
+        self.assertEqual(puzzle.open_edges(pieces[(0, 0)]),
+                         {((0, 1), (0, 2)), ((0, 1), (1, 1)), ((1, 0), (1, 1))})
+        corner = pieces[(1, 1)]
+        corner.piece.topleft = (pieces[(1, 0)].piece.right + 4, pieces[(1, 0)].piece.top - 6)
+        puzzle.active = corner
+        puzzle.drop_active()
+        self.assertEqual(puzzle.find_group(corner), {pieces[pos] for pos in [(0, 0), (0, 1), (1, 0), (1, 1)]})
+        self.assertEqual(corner.piece.topleft, (pieces[(1, 0)].piece.right, pieces[(1, 0)].piece.top))
+        self.assertEqual(puzzle.open_edges(corner), {((0, 1), (0, 2)), ((1, 1), (1, 2))})
+
+    def test_merge_moves_smaller_group(self):
+        test_dir = os.path.dirname(__file__)
+        image_path = os.path.join(test_dir, 'puzzle_test.jpg')
+        puzzle = RegularPuzzle(pygame.Surface((800, 600)), 600, 300, 8, image_path, False)
+        pieces = puzzle.pieces
+        puzzle.connect_pieces(pieces[(0, 1)], pieces[(0, 0)], (0, -1))
+        puzzle.connect_pieces(pieces[(1, 0)], pieces[(0, 0)], (-1, 0))
+        before = {pos: pieces[pos].piece.topleft for pos in [(0, 0), (0, 1), (1, 0)]}
+        puzzle.draw(pygame.Surface((800, 600)), (0, 0, 0))  # composites the group before it grows
+        puzzle.connect_pieces(pieces[(0, 1)], pieces[(1, 1)], (1, 0))
+        self.assertEqual({pos: pieces[pos].piece.topleft for pos in before}, before)
+        self.assertEqual(pieces[(1, 1)].piece.topleft, (pieces[(1, 0)].piece.right, pieces[(1, 0)].piece.top))
+        root = puzzle._groups.find(pieces[(1, 1)])
+        bounds = puzzle.group_bounds(root)
+        rects = [piece.get_draw_rect() for piece in pieces.values() if puzzle._groups.find(piece) is root]
+        self.assertEqual(bounds, rects[0].unionall(rects[1:]))
+        drawn, expected = pygame.Surface((800, 600), pygame.SRCALPHA), pygame.Surface((800, 600), pygame.SRCALPHA)
+        puzzle._sprite_for(root).draw(drawn, bounds)
+        GroupSprite(puzzle._groups.members(root)).draw(expected, bounds)
+        self.assertEqual(pygame.image.tostring(drawn, "RGBA"), pygame.image.tostring(expected, "RGBA"))
+
+    def test_possible_piece_dims(self):
+        dims = RegularPuzzle.get_possible_piece_dims(600, 300)
+        self.assertEqual(dims, sorted(dims))
+        self.assertIn((8, (4, 2)), dims)
+        self.assertNotIn(1, [amount for amount, _ in dims])
+        for amount, (cols, rows) in dims:
+            self.assertEqual(cols * rows, amount)
+            self.assertLessEqual(max(600 / cols, 300 / rows) / min(600 / cols, 300 / rows), 1.6)
+        test_dir = os.path.dirname(__file__)
+        puzzle = RegularPuzzle(pygame.Surface((800, 600)), 600, 300, dims[-1][0],
+                               os.path.join(test_dir, 'puzzle_test.jpg'), False)
+        self.assertEqual(puzzle.rowcols, dims[-1][1])
+
 
 if __name__ == '__main__':
     try:
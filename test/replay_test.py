@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+import pygame
+from src import custom_timer
+from src.event_recorder import read_recording
+from src.regular_puzzle import RegularPuzzle
+from game_state import Play
+from replay import digest, replay
+
+
+class ReplayTestCase(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(setattr, Play, 'recording_dir', None)
+        custom_timer.timers.reset()
+        self.addCleanup(custom_timer.timers.reset)
+
+    def play_recorded(self, drag=False):
+        image_path = os.path.join(os.path.dirname(__file__), 'puzzle_test.jpg')
+        surface = pygame.Surface((800, 600))
+        puzzle = RegularPuzzle(surface, 600, 300, 8, image_path, False, seed=5)
+        puzzle.save_path = os.path.join(self.tmp.name, "live.pkl")
+        Play.recording_dir = os.path.join(self.tmp.name, "recordings")
+        play = Play.from_existing_puzzle(surface, Play.THEMES['darkblue'], puzzle)
+        Play.recording_dir = None
+        moving, target = puzzle.pieces[(0, 1)], puzzle.pieces[(0, 0)]
+        grab = moving.piece.center
+        offset = (target.piece.right + 3 - moving.piece.x, target.piece.y - 2 - moving.piece.y)
+        if drag:  # held for longer than the drag timer, released where it should snap
+            frames = [[pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=grab, button=1)],
+                      [],
+                      [pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0), rel=offset, buttons=(1, 0, 0))],
+                      [pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(0, 0), button=1)]]
+        else:  # clicked to pick up, moved and clicked again to drop
+            frames = [[pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=grab, button=1),
+                       pygame.event.Event(pygame.MOUSEBUTTONUP, pos=grab, button=1)],
+                      [],
+                      [pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0), rel=offset, buttons=(0, 0, 0))],
+                      [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(0, 0), button=1),
+                       pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(0, 0), button=1)]]
+        for events in frames:
+            custom_timer.timers.tick(100)
+            play.handle_events(events)
+            play.draw()
+        return play
+
+    def test_replay_reproduces_the_game(self):
+        play = self.play_recorded()
+        puzzle = play.puzzle
+        self.assertEqual(len(puzzle.connected_groups), 1)
+        filename = puzzle.recorder.filename
+        play.stop_recording()
+        header, records = read_recording(filename)
+        self.assertEqual(header['seed'], 5)
+        self.assertEqual([frame for frame, _, _ in records], [0, 2, 3])
+
+        replayed, frames = replay(filename, self.tmp.name)
+        self.assertEqual(frames, 3)
+        self.assertEqual(digest(replayed.puzzle), digest(puzzle))
+        replayed, frames = replay(filename, self.tmp.name, every_frame=True)
+        self.assertEqual(frames, 4)
+        self.assertEqual(digest(replayed.puzzle), digest(puzzle))
+        puzzle.autosaver.wait()
+        replayed.puzzle.autosaver.wait()
+
+    def test_replay_keeps_drags_apart_from_clicks(self):
+        play = self.play_recorded(drag=True)
+        puzzle = play.puzzle
+        self.assertIsNone(puzzle.active)
+        self.assertEqual(len(puzzle.connected_groups), 1)
+        filename = puzzle.recorder.filename
+        play.stop_recording()
+        self.assertEqual([ms for _, ms, _ in read_recording(filename)[1]], [100, 300, 400])
+        replayed, frames = replay(filename, self.tmp.name)
+        self.assertIsNone(replayed.puzzle.active)
+        self.assertEqual(digest(replayed.puzzle), digest(puzzle))
+        puzzle.autosaver.wait()
+        replayed.puzzle.autosaver.wait()
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,39 @@
+import unittest
+import pygame
+from src import rotation_cache
+from src.square_puzzle_piece import SquarePiece
+
+
+class RotationCacheTestCase(unittest.TestCase):
+    def tearDown(self):
+        rotation_cache.clear()
+
+    def test_variants_are_shared(self):
+        image = pygame.Surface((20, 10))
+        piece = SquarePiece(0, 0, 20, 10, image)
+        self.assertIs(piece.image, image)
+        piece.rotate(True)
+        self.assertEqual(piece.image.get_size(), (10, 20))
+        self.assertEqual(piece.piece.size, (10, 20))
+        self.assertIs(SquarePiece(0, 0, 20, 10, image, 1).image, piece.image)
+        piece.rotate(False)
+        self.assertIs(piece.image, image)
+
+    def test_memory_cap(self):
+        old_cap = rotation_cache.MAX_ROTATED_BYTES
+        rotation_cache.MAX_ROTATED_BYTES = 3 * 10 * 10 * 4
+        try:
+            images = [pygame.Surface((10, 10), pygame.SRCALPHA) for _ in range(3)]
+            for image in images:
+                for direction in range(1, 4):
+                    rotation_cache.rotated(image, direction)
+            self.assertLessEqual(rotation_cache.used_bytes(), rotation_cache.MAX_ROTATED_BYTES)
+        finally:
+            rotation_cache.MAX_ROTATED_BYTES = old_cap
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
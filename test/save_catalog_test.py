@@ -0,0 +1,49 @@
+import os
+import pickle
+import tempfile
+import unittest
+import pygame
+from src.regular_puzzle import RegularPuzzle
+from src.save_catalog import SaveCatalog
+
+
+class SaveCatalogTestCase(unittest.TestCase):
+    def test_saves_are_indexed_and_cleared(self):
+        image_path = os.path.join(os.path.dirname(__file__), 'puzzle_test.jpg')
+        puzzle = RegularPuzzle(pygame.Surface((800, 600)), 600, 300, 8, image_path, False)
+        puzzle.connect_pieces(puzzle.pieces[(0, 0)], puzzle.pieces[(0, 1)], (0, 1))
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = SaveCatalog(tmp)
+            puzzle.save_path = os.path.join(tmp, "save.pkl")
+            puzzle.save_to_file()
+            [entry] = catalog.find(image_path, 'regular', 8)
+            self.assertEqual(entry['path'], os.path.normpath(puzzle.save_path))
+            self.assertAlmostEqual(entry['progress'], 1 / 7)
+            self.assertEqual(entry['file_size'], os.path.getsize(puzzle.save_path))
+            self.assertEqual(catalog.find(image_path, 'square', 8), [])
+            puzzle.clearsave(puzzle.save_path)
+            self.assertEqual(catalog.find(image_path, 'regular', 8), [])
+            self.assertEqual(os.listdir(tmp), ["catalog.sqlite3"])
+
+    def test_collect_garbage(self):
+        image_path = os.path.join(os.path.dirname(__file__), 'puzzle_test.jpg')
+        puzzle = RegularPuzzle(pygame.Surface((800, 600)), 600, 300, 8, image_path, False)
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = SaveCatalog(tmp)
+            puzzle.save_path = os.path.join(tmp, "gone.pkl")
+            puzzle.save_to_file()
+            os.remove(puzzle.save_path)
+            open(os.path.join(tmp, "empty.pkl"), 'w').close()
+            with open(os.path.join(tmp, "untracked.pkl"), 'wb') as file:
+                pickle.dump(puzzle.serialize(), file)
+            catalog.collect_garbage()
+            [entry] = catalog.find(image_path, 'regular', 8)
+            self.assertEqual(entry['path'], os.path.join(tmp, "untracked.pkl"))
+            self.assertEqual(sorted(os.listdir(tmp)), ["catalog.sqlite3", "untracked.pkl"])
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
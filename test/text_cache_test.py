@@ -0,0 +1,30 @@
+import unittest
+import pygame
+from src import text_cache
+
+
+class TextCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        pygame.font.init()
+        text_cache.clear()
+
+    def test_reuses_fonts_and_surfaces(self):
+        font = text_cache.get_font(None, 20)
+        self.assertIs(text_cache.get_font(None, 20), font)
+        surface = text_cache.render_text(font, "Play", (0, 0, 0))
+        self.assertIs(text_cache.render_text(font, "Play", [0, 0, 0]), surface)
+        self.assertIsNot(text_cache.render_text(font, "Play", (255, 0, 0)), surface)
+
+    def test_cache_is_bounded(self):
+        font = text_cache.get_font(None, 20)
+        first = text_cache.render_text(font, "0", (0, 0, 0))
+        for i in range(1, text_cache.MAX_RENDERED_TEXTS + 1):
+            text_cache.render_text(font, str(i), (0, 0, 0))
+        self.assertIsNot(text_cache.render_text(font, "0", (0, 0, 0)), first)
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass